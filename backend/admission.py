@@ -0,0 +1,220 @@
+import asyncio
+import itertools
+import math
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from starlette.responses import JSONResponse
+
+# Long-lived or trivial endpoints that are never queued
+EXEMPT_PATHS = {"/api/", "/api/metrics", "/api/agreements/stream"}
+
+# Route class -> (concurrency limit, queue size, max queue wait in seconds); listed in priority order
+DEFAULT_LIMITS = {
+    "writes": (16, 64, 5.0),
+    "reads": (32, 64, 2.0),
+    "analytics": (4, 8, 10.0),
+}
+# Shared by all classes; Starlette's threadpool runs 40 blocking calls at once
+DEFAULT_TOTAL_LIMIT = 40
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request, or None when it bypasses admission control"""
+    if method == "OPTIONS" or not path.startswith("/api/") or path in EXEMPT_PATHS:
+        return None
+    if path.startswith("/api/reports"):
+        # Polling a report job (GET /api/reports/{id}) is cheap; creating and downloading are exports
+        if method == "GET" and path.count("/") == 3:
+            return "reads"
+        return "analytics"
+    if path.startswith("/api/analytics/"):
+        return "analytics"
+    if method in ("POST", "PUT", "PATCH", "DELETE"):
+        return "writes"
+    return "reads"
+
+
+class RouteClass:
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait: float, priority: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.priority = priority
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected: Counter = Counter()
+        # Moving average of how long an admitted request holds its slot
+        self.service_time = 0.05
+
+    def estimated_wait(self, position: int) -> float:
+        """Expected queue wait for the position-th waiter, from the average service time"""
+        return math.ceil(position / self.limit) * self.service_time
+
+
+class _Waiter:
+    def __init__(self, route_class: RouteClass, seq: int):
+        self.route_class = route_class
+        self.seq = seq
+        self.future = asyncio.get_running_loop().create_future()
+        self.granted = False
+
+
+class AdmissionController:
+    """
+    Bounded concurrency per route class (writes, reads, analytics).
+
+    A request starts when its class and the shared total both have a free
+    slot; otherwise it waits in a bounded queue. Freed slots go to waiting
+    writes first, then reads, then analytics, so data entry stays
+    responsive under load. A request whose expected wait exceeds its
+    class's max wait, or that waits that long, is rejected right away
+    (503 with Retry-After) instead of holding a connection until the
+    client times out.
+    """
+
+    def __init__(self, limits: Dict[str, tuple] = None, total_limit: int = DEFAULT_TOTAL_LIMIT):
+        limits = limits or DEFAULT_LIMITS
+        self.classes = {
+            name: RouteClass(name, *limits[name], priority=priority)
+            for priority, name in enumerate(limits)
+        }
+        self.total_limit = total_limit
+        self.active = 0
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _can_start(self, route_class: RouteClass) -> bool:
+        return route_class.active < route_class.limit and self.active < self.total_limit
+
+    def _start(self, route_class: RouteClass) -> None:
+        route_class.active += 1
+        route_class.admitted += 1
+        self.active += 1
+
+    def _reject(self, route_class: RouteClass, reason: str, wait: float) -> int:
+        route_class.rejected[reason] += 1
+        return max(1, math.ceil(wait))
+
+    async def acquire(self, name: str) -> Optional[int]:
+        """Wait for a slot; returns None once admitted, or the Retry-After seconds when rejected"""
+        route_class = self.classes[name]
+        if route_class.queued == 0 and self._can_start(route_class):
+            self._start(route_class)
+            return None
+
+        position = route_class.queued + 1
+        estimate = route_class.estimated_wait(position)
+        if route_class.queued >= route_class.queue_size:
+            return self._reject(route_class, "queue_full", estimate)
+        if estimate > route_class.max_wait:
+            return self._reject(route_class, "deadline", estimate)
+
+        waiter = _Waiter(route_class, next(self._seq))
+        self._waiting.append(waiter)
+        route_class.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), route_class.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # The client went away; hand back a slot granted in the meantime
+            if waiter.granted:
+                self.release(name)
+            raise
+        finally:
+            self._waiting.remove(waiter)
+            route_class.queued -= 1
+
+        if waiter.granted:
+            return None
+        return self._reject(route_class, "deadline", route_class.estimated_wait(route_class.queued + 1))
+
+    def release(self, name: str, elapsed: Optional[float] = None) -> None:
+        route_class = self.classes[name]
+        route_class.active -= 1
+        self.active -= 1
+        if elapsed is not None:
+            route_class.service_time = 0.8 * route_class.service_time + 0.2 * elapsed
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for waiter in sorted(self._waiting, key=lambda w: (w.route_class.priority, w.seq)):
+            if self.active >= self.total_limit:
+                break
+            if not waiter.granted and self._can_start(waiter.route_class):
+                waiter.granted = True
+                self._start(waiter.route_class)
+                waiter.future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "total_limit": self.total_limit,
+            "queue_depth": len(self._waiting),
+            "classes": {
+                name: {
+                    "active": route_class.active,
+                    "limit": route_class.limit,
+                    "queued": route_class.queued,
+                    "queue_size": route_class.queue_size,
+                    "admitted": route_class.admitted,
+                    "rejected": dict(route_class.rejected),
+                    "service_time": round(route_class.service_time, 4),
+                }
+                for name, route_class in self.classes.items()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """Apply an AdmissionController to API requests (see classify())"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        name = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self.controller.acquire(name)
+        if retry_after is not None:
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later"},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.monotonic() - started)
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Build the controller when ADMISSION_CONTROL is enabled. Limits come from
+    ADMISSION_<CLASS>_LIMIT / _QUEUE / _MAX_WAIT (class: WRITES, READS,
+    ANALYTICS) and ADMISSION_TOTAL_LIMIT.
+    """
+    if os.environ.get("ADMISSION_CONTROL", "").lower() not in ("1", "true", "yes"):
+        return None
+    limits = {}
+    for name, (limit, queue_size, max_wait) in DEFAULT_LIMITS.items():
+        prefix = f"ADMISSION_{name.upper()}"
+        limits[name] = (
+            int(os.environ.get(f"{prefix}_LIMIT", limit)),
+            int(os.environ.get(f"{prefix}_QUEUE", queue_size)),
+            float(os.environ.get(f"{prefix}_MAX_WAIT", max_wait)),
+        )
+    return AdmissionController(limits, int(os.environ.get("ADMISSION_TOTAL_LIMIT", DEFAULT_TOTAL_LIMIT)))
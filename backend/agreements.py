@@ -0,0 +1,342 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional
+import uuid
+from datetime import datetime, timezone
+
+
+class RelativeDelta:
+    """Custom implementation to replace dateutil.relativedelta"""
+    def __init__(self, dt1=None, dt2=None, months=0, years=0):
+        if dt1 and dt2:
+            # Calculate difference between two dates
+            self.years = dt1.year - dt2.year
+            self.months = dt1.month - dt2.month
+
+            if self.months < 0:
+                self.years -= 1
+                self.months += 12
+        else:
+            # Store months to add
+            self.years = years
+            self.months = months
+
+    def __radd__(self, dt):
+        """Add months to a datetime object"""
+        if isinstance(dt, datetime):
+            total_months = dt.month + self.months + (self.years * 12)
+            years_to_add = (total_months - 1) // 12
+            new_month = ((total_months - 1) % 12) + 1
+            new_year = dt.year + years_to_add
+
+            # Handle day overflow (e.g., Jan 31 + 1 month = Feb 28/29)
+            max_day_in_month = [31, 29 if self._is_leap_year(new_year) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+            new_day = min(dt.day, max_day_in_month[new_month - 1])
+
+            return dt.replace(year=new_year, month=new_month, day=new_day)
+        return NotImplemented
+
+    @staticmethod
+    def _is_leap_year(year):
+        """Check if a year is a leap year"""
+        return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+def relativedelta(*args, **kwargs):
+    """Factory function to match dateutil.relativedelta interface"""
+    if len(args) == 2:
+        return RelativeDelta(args[0], args[1])
+    return RelativeDelta(**kwargs)
+
+def parse_area_to_guntas(area_str: str) -> float:
+    """
+    Converts area like:
+    1.50.0  -> 150.00
+    0.81.6  -> 81.60
+    0.69.4  -> 69.40
+    0.52.18 -> 52.18
+    """
+    try:
+        parts = area_str.split('.')
+        if len(parts) != 3:
+            return 0.0
+
+        whole = int(parts[0])
+        guntas = int(parts[1])
+        decimal = parts[2]
+
+        # if decimal has 1 digit → treat as tenths (×10)
+        if len(decimal) == 1:
+            decimal_value = int(decimal) / 10
+        else:
+            decimal_value = int(decimal) / 100
+
+        return whole * 100 + guntas + decimal_value
+
+    except:
+        return 0.0
+
+def calculate_development_end_date(agreement_date: str, development_months: int) -> datetime:
+    """Calculate development end date"""
+    try:
+        date_obj = datetime.strptime(agreement_date, "%d-%m-%Y")
+        end_date = date_obj + relativedelta(months=development_months)
+        return end_date
+    except:
+        return datetime.now()
+
+def calculate_rent_months(dev_end_date: datetime, possession_status: str) -> int:
+    """Calculate total rent months"""
+    if possession_status.lower() == "given":
+        return 0
+    now = datetime.now()
+    diff = relativedelta(now, dev_end_date)
+    total_months = diff.years * 12 + diff.months
+    return max(0, total_months)
+
+def calculate_total_rent(total_months: int, rent_per_sqft: float, free_area_bu: float) -> float:
+    """Calculate total rent"""
+    return total_months * rent_per_sqft * free_area_bu
+
+def calculate_real_value(free_area_bu: float, guntas: float) -> float:
+    """Calculate real value per acre"""
+    if guntas == 0:
+        return 0
+    return (free_area_bu / guntas) * 40
+
+def calculate_agreement_expenses(agreement_data: dict) -> dict:
+    """Calculate all agreement expenses"""
+    agmt1 = (
+        agreement_data.get('stamp_duty_1', 0) +
+        agreement_data.get('regi_dd_1', 0) +
+        agreement_data.get('handling_charges_1', 0) +
+        agreement_data.get('adjudication_1', 0) +
+        agreement_data.get('legal_expenses_1', 0)
+    )
+
+    agmt2 = (
+        agreement_data.get('stamp_duty_2', 0) +
+        agreement_data.get('regi_dd_2', 0) +
+        agreement_data.get('handling_charges_2', 0) +
+        agreement_data.get('legal_expenses_2', 0)
+    )
+
+    agmt3 = (
+        agreement_data.get('stamp_duty_3', 0) +
+        agreement_data.get('regi_dd_3', 0) +
+        agreement_data.get('handling_charges_3', 0)
+    )
+
+    total = agmt1 + agmt2 + agmt3
+
+    return {
+        'agreement_1_expense': agmt1,
+        'agreement_2_expense': agmt2,
+        'agreement_3_expense': agmt3,
+        'total_agreement_expense': total
+    }
+
+# Stored expense totals and the input fields each one sums
+EXPENSE_FIELDS = {
+    'agreement_1_expense': ['stamp_duty_1', 'regi_dd_1', 'handling_charges_1', 'adjudication_1', 'legal_expenses_1'],
+    'agreement_2_expense': ['stamp_duty_2', 'regi_dd_2', 'handling_charges_2', 'legal_expenses_2'],
+    'agreement_3_expense': ['stamp_duty_3', 'regi_dd_3', 'handling_charges_3'],
+}
+
+def changes_need_row_recompute(changes: dict, rent_multiplier: Optional[float] = None) -> bool:
+    """
+    Whether bulk changes depend on the rent months.
+
+    total_months counts up to the day a row is written, so changes that move
+    the development end date, clear possession or recompute total_rent are
+    rebuilt row by row with build_agreement_record, exactly as PUT does;
+    every other derived field is recomputed by the storage backend as a
+    set-based expression, leaving total_months and total_rent as last
+    written (a change to "Given" sets both to zero).
+    """
+    if 'agreement_date' in changes or 'development_months' in changes:
+        return True
+    status = changes.get('possession_status')
+    if status is not None:
+        return status.lower() != "given"
+    return rent_multiplier is not None or 'rent_per_sqft' in changes or 'free_area_bu' in changes
+
+def apply_agreement_changes(record: dict, changes: dict, rent_multiplier: Optional[float] = None) -> dict:
+    """Rebuild a stored record with bulk changes applied, keeping its id and created_at"""
+    data = {name: record[name] for name in AgreementCreate.model_fields}
+    data.update(changes)
+    if rent_multiplier is not None:
+        data['rent_per_sqft'] = data['rent_per_sqft'] * rent_multiplier
+    updated = build_agreement_record(AgreementCreate(**data), record['id'])
+    updated['created_at'] = record['created_at']
+    return updated
+
+def build_agreement_record(input_data: "AgreementCreate", agreement_id: Optional[str] = None) -> dict:
+    """Build a full agreement record (input fields plus derived fields)"""
+    data = input_data.model_dump()
+    area_guntas = parse_area_to_guntas(input_data.area)
+    dev_end_date = calculate_development_end_date(input_data.agreement_date, input_data.development_months)
+    total_months = calculate_rent_months(dev_end_date, input_data.possession_status)
+    total_rent = calculate_total_rent(total_months, input_data.rent_per_sqft, input_data.free_area_bu)
+    real_value = calculate_real_value(input_data.free_area_bu, area_guntas)
+    expenses = calculate_agreement_expenses(data)
+
+    data.update({
+        'id': agreement_id or str(uuid.uuid4()),
+        'area_in_guntas': area_guntas,
+        'development_end_date': dev_end_date.strftime("%d-%m-%Y"),
+        'total_months': total_months,
+        'total_rent': total_rent,
+        'real_value_per_acre': real_value,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        **expenses
+    })
+    return data
+
+# Models
+class AgreementCreate(BaseModel):
+    survey_no: str
+    firm_name: Optional[str] = ""
+    land_owner: Optional[str] = ""
+    area: str
+    doc_no_1: str
+    agreement_date: str
+    development_months: int
+    possession_status: str
+    rent_per_sqft: float
+    free_area_bu: float
+    free_area_cp: float
+    agreement_value: float
+    deposit_da: float
+    stamp_duty_1: float = 0
+    regi_dd_1: float = 0
+    handling_charges_1: float = 0
+    adjudication_1: float = 0
+    legal_expenses_1: float = 0
+    doc_no_2: Optional[str] = ""
+    date_2: Optional[str] = ""
+    stamp_duty_2: float = 0
+    regi_dd_2: float = 0
+    handling_charges_2: float = 0
+    legal_expenses_2: float = 0
+    doc_no_3: Optional[str] = ""
+    stamp_duty_3: float = 0
+    regi_dd_3: float = 0
+    handling_charges_3: float = 0
+
+class Agreement(BaseModel):
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
+
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    survey_no: str
+    firm_name: str
+    land_owner: str
+    area: str
+    area_in_guntas: float
+    doc_no_1: str
+    agreement_date: str
+    development_months: int
+    development_end_date: str
+    possession_status: str
+    rent_per_sqft: float
+    free_area_bu: float
+    free_area_cp: float
+    total_months: int
+    total_rent: float
+    agreement_value: float
+    deposit_da: float
+    stamp_duty_1: float
+    regi_dd_1: float
+    handling_charges_1: float
+    adjudication_1: float
+    legal_expenses_1: float
+    doc_no_2: str
+    date_2: str
+    stamp_duty_2: float
+    regi_dd_2: float
+    handling_charges_2: float
+    legal_expenses_2: float
+    doc_no_3: str
+    stamp_duty_3: float
+    regi_dd_3: float
+    handling_charges_3: float
+    agreement_1_expense: float
+    agreement_2_expense: float
+    agreement_3_expense: float
+    total_agreement_expense: float
+    real_value_per_acre: float
+    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+class DashboardSummary(BaseModel):
+    total_land_count: int
+    total_area_guntas: float
+    total_free_bu_area: float
+    total_rent_value: float
+    total_agreement_expenses: float
+    net_project_cost: float
+
+class AgreementFilter(BaseModel):
+    """Selects agreements for bulk operations; set criteria are combined with AND"""
+    ids: Optional[List[str]] = None
+    survey_nos: Optional[List[str]] = None
+    firm_name: Optional[str] = None
+    land_owner: Optional[str] = None
+    possession_status: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return not self.model_dump(exclude_none=True)
+
+class AgreementChanges(BaseModel):
+    """Input fields to overwrite on every selected agreement (unset fields are left alone)"""
+    survey_no: Optional[str] = None
+    firm_name: Optional[str] = None
+    land_owner: Optional[str] = None
+    area: Optional[str] = None
+    doc_no_1: Optional[str] = None
+    agreement_date: Optional[str] = None
+    development_months: Optional[int] = None
+    possession_status: Optional[str] = None
+    rent_per_sqft: Optional[float] = None
+    free_area_bu: Optional[float] = None
+    free_area_cp: Optional[float] = None
+    agreement_value: Optional[float] = None
+    deposit_da: Optional[float] = None
+    stamp_duty_1: Optional[float] = None
+    regi_dd_1: Optional[float] = None
+    handling_charges_1: Optional[float] = None
+    adjudication_1: Optional[float] = None
+    legal_expenses_1: Optional[float] = None
+    doc_no_2: Optional[str] = None
+    date_2: Optional[str] = None
+    stamp_duty_2: Optional[float] = None
+    regi_dd_2: Optional[float] = None
+    handling_charges_2: Optional[float] = None
+    legal_expenses_2: Optional[float] = None
+    doc_no_3: Optional[str] = None
+    stamp_duty_3: Optional[float] = None
+    regi_dd_3: Optional[float] = None
+    handling_charges_3: Optional[float] = None
+    # Applied after any rent_per_sqft value above, e.g. 1.1 for a 10% rise
+    rent_per_sqft_multiplier: Optional[float] = None
+
+class BulkUpdateRequest(BaseModel):
+    """
+    Overwrite input fields on every matching agreement. Changes to rent,
+    free area, dates or possession refresh total_months to today like PUT;
+    other changes keep each row's total_months and total_rent as last written.
+    """
+    where: AgreementFilter
+    changes: AgreementChanges
+
+class BulkUpdateResult(BaseModel):
+    updated: int
+
+class BulkDeleteRequest(BaseModel):
+    where: AgreementFilter
+
+class BulkDeleteResult(BaseModel):
+    deleted: int
+
+class ImportResult(BaseModel):
+    created: int
+    updated: int
+
+AGREEMENT_FIELDS = list(Agreement.model_fields)
@@ -0,0 +1,156 @@
+import numpy as np
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+from agreements import DashboardSummary, EXPENSE_FIELDS
+
+# Columns needed to rebuild the rent and expense figures
+SNAPSHOT_FIELDS = [
+    'id', 'survey_no', 'firm_name', 'land_owner', 'agreement_date',
+    'development_months', 'possession_status', 'rent_per_sqft',
+    'free_area_bu', 'area_in_guntas', 'deposit_da',
+    'stamp_duty_1', 'regi_dd_1', 'handling_charges_1', 'adjudication_1', 'legal_expenses_1',
+    'stamp_duty_2', 'regi_dd_2', 'handling_charges_2', 'legal_expenses_2',
+    'stamp_duty_3', 'regi_dd_3', 'handling_charges_3',
+]
+
+# Models
+class ScenarioOverride(BaseModel):
+    """Changes applied to every agreement matching the selectors (all agreements if none are set)"""
+    ids: Optional[List[str]] = None
+    survey_nos: Optional[List[str]] = None
+    firm_name: Optional[str] = None
+    land_owner: Optional[str] = None
+    rent_multiplier: float = 1.0
+    development_months_shift: int = 0
+    possession_status: Optional[str] = None
+
+class Scenario(BaseModel):
+    name: str
+    overrides: List[ScenarioOverride] = Field(default_factory=list)
+
+class SimulationRequest(BaseModel):
+    scenarios: List[Scenario]
+
+class ScenarioResult(BaseModel):
+    name: str
+    affected_agreements: int
+    totals: DashboardSummary
+    deltas: DashboardSummary
+
+class SimulationResult(BaseModel):
+    baseline: DashboardSummary
+    scenarios: List[ScenarioResult]
+
+
+def _month_index(agreement_dates: List[str]):
+    """Parse dd-mm-YYYY dates into year*12 + month-1, with a validity mask"""
+    index = np.zeros(len(agreement_dates), dtype=np.int64)
+    valid = np.zeros(len(agreement_dates), dtype=bool)
+    for i, value in enumerate(agreement_dates):
+        try:
+            date_obj = datetime.strptime(value, "%d-%m-%Y")
+        except (TypeError, ValueError):
+            continue
+        index[i] = date_obj.year * 12 + date_obj.month - 1
+        valid[i] = True
+    return index, valid
+
+
+class PortfolioSnapshot:
+    """
+    Columnar, read-only copy of the agreements used for what-if runs.
+
+    Mirrors calculate_rent_months / calculate_total_rent /
+    calculate_agreement_expenses over whole columns, so a scenario costs a
+    few array operations instead of one recalculation per row.
+    """
+
+    def __init__(self, rows: List[dict]):
+        self.size = len(rows)
+        self.text = {
+            name: np.array([row.get(name) or "" for row in rows], dtype=object)
+            for name in ('id', 'survey_no', 'firm_name', 'land_owner', 'possession_status')
+        }
+        self.numeric = {
+            name: np.array([row.get(name) or 0 for row in rows], dtype=np.float64)
+            for name in SNAPSHOT_FIELDS
+            if name not in self.text and name != 'agreement_date'
+        }
+        self.start_month, self.date_valid = _month_index([row.get('agreement_date') for row in rows])
+        self.given = np.array([s.lower() == "given" for s in self.text['possession_status']], dtype=bool)
+
+        self.total_expense = np.zeros(self.size)
+        for fields in EXPENSE_FIELDS.values():
+            for field in fields:
+                self.total_expense += self.numeric[field]
+
+    def select(self, override: ScenarioOverride) -> np.ndarray:
+        """Boolean mask of the agreements an override applies to"""
+        mask = np.ones(self.size, dtype=bool)
+        if override.ids is not None:
+            mask &= np.isin(self.text['id'], override.ids)
+        if override.survey_nos is not None:
+            mask &= np.isin(self.text['survey_no'], override.survey_nos)
+        if override.firm_name is not None:
+            mask &= self.text['firm_name'] == override.firm_name
+        if override.land_owner is not None:
+            mask &= self.text['land_owner'] == override.land_owner
+        return mask
+
+    def totals(self, rent_per_sqft, development_months, given, now: datetime) -> DashboardSummary:
+        now_month = now.year * 12 + now.month - 1
+        end_month = self.start_month + development_months.astype(np.int64)
+        # An unparseable agreement date ends development "now", i.e. no rent months
+        rent_months = np.where(self.date_valid & ~given, np.maximum(now_month - end_month, 0), 0)
+        total_rent = rent_months * rent_per_sqft * self.numeric['free_area_bu']
+        total_expenses = float(self.total_expense.sum())
+
+        return DashboardSummary(
+            total_land_count=self.size,
+            total_area_guntas=float(self.numeric['area_in_guntas'].sum()),
+            total_free_bu_area=float(self.numeric['free_area_bu'].sum()),
+            total_rent_value=float(total_rent.sum()),
+            total_agreement_expenses=total_expenses,
+            net_project_cost=total_expenses + float(self.numeric['deposit_da'].sum()),
+        )
+
+    def baseline(self, now: Optional[datetime] = None) -> DashboardSummary:
+        return self.totals(
+            self.numeric['rent_per_sqft'], self.numeric['development_months'], self.given, now or datetime.now()
+        )
+
+    def simulate(self, scenario: Scenario, baseline: DashboardSummary, now: datetime) -> ScenarioResult:
+        """Apply a scenario's overrides in order and total the result; nothing is written back"""
+        rent_per_sqft = self.numeric['rent_per_sqft'].copy()
+        development_months = self.numeric['development_months'].copy()
+        given = self.given.copy()
+        affected = np.zeros(self.size, dtype=bool)
+
+        for override in scenario.overrides:
+            mask = self.select(override)
+            affected |= mask
+            rent_per_sqft[mask] *= override.rent_multiplier
+            development_months[mask] = np.maximum(development_months[mask] + override.development_months_shift, 0)
+            if override.possession_status is not None:
+                given[mask] = override.possession_status.lower() == "given"
+
+        totals = self.totals(rent_per_sqft, development_months, given, now)
+        deltas = DashboardSummary(**{
+            key: value - getattr(baseline, key) for key, value in totals.model_dump().items()
+        })
+        return ScenarioResult(
+            name=scenario.name,
+            affected_agreements=int(affected.sum()),
+            totals=totals,
+            deltas=deltas,
+        )
+
+    def run(self, request: SimulationRequest) -> SimulationResult:
+        now = datetime.now()
+        baseline = self.baseline(now)
+        return SimulationResult(
+            baseline=baseline,
+            scenarios=[self.simulate(scenario, baseline, now) for scenario in request.scenarios],
+        )
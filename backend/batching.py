@@ -0,0 +1,112 @@
+import asyncio
+import os
+import logging
+from typing import List, Optional, Tuple
+
+from routing import record_write
+from storage import AgreementRepository, BatchWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class WriteCoalescer:
+    """
+    Group commit for single-row creates.
+
+    Records submitted within `window` seconds of the first pending one (or
+    until `max_rows` are pending) are written with one multi-row INSERT and
+    one commit. Each caller still gets back its own record, or its own
+    error: rows a backend reports as failed get their error, and if a
+    whole batch is rolled back the rows are retried one by one.
+    """
+
+    def __init__(self, storage: AgreementRepository, window: float = 0.005, max_rows: int = 50):
+        self.storage = storage
+        self.window = window
+        self.max_rows = max_rows
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, record: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        if len(self._pending) >= self.max_rows:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._schedule_flush)
+        result = await future
+        # The flush ran in another task; pin this caller's reads to the primary too
+        record_write()
+        return result
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        records = [record for record, _ in batch]
+        self.batches += 1
+        self.rows += len(records)
+        try:
+            await self.storage.create_many(records)
+        except BatchWriteError as exc:
+            for index, (record, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if index in exc.errors:
+                    future.set_exception(exc.errors[index])
+                else:
+                    future.set_result(record)
+            return
+        except Exception as exc:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(exc)
+                return
+            logger.warning("Batched insert of %d rows failed, retrying individually", len(batch))
+            await asyncio.gather(*(self._flush_one(record, future) for record, future in batch))
+            return
+        for record, future in batch:
+            if not future.done():
+                future.set_result(record)
+
+    async def _flush_one(self, record: dict, future: asyncio.Future) -> None:
+        try:
+            result = await self.storage.create(record)
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'pending': len(self._pending),
+        }
+
+    async def close(self) -> None:
+        """Write out anything still pending"""
+        self._schedule_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+def get_write_coalescer(storage: AgreementRepository) -> Optional[WriteCoalescer]:
+    """Build the coalescer when WRITE_BATCH_WINDOW_MS is set above zero"""
+    window_ms = float(os.environ.get("WRITE_BATCH_WINDOW_MS", "0"))
+    if window_ms <= 0:
+        return None
+    max_rows = int(os.environ.get("WRITE_BATCH_MAX_ROWS", "50"))
+    return WriteCoalescer(storage, window_ms / 1000, max_rows)
@@ -0,0 +1,92 @@
+"""
+Storage benchmark run.
+
+Times bulk creates, concurrent creates with and without the group-commit
+coalescer, list pages and the dashboard summary for each selected backend.
+Behaviour shared by the backends is checked by tests/test_storage.py.
+
+    python bench_storage.py sqlite mysql mongo --rows 500 --writers 100
+
+sqlite uses a throwaway file; mysql and mongo use DATABASE_URL and
+MONGO_URL/DB_NAME from the environment and must point at scratch databases.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from batching import WriteCoalescer
+from storage import get_repository
+
+# The sample agreements are shared with the test suite
+sys.path.insert(0, str(ROOT_DIR.parent))
+from tests.samples import clear, sample_record
+
+async def concurrent_creates(create, rows: int, writers: int) -> float:
+    """Seconds taken by `writers` concurrent tasks to create `rows` records in total"""
+    queue = list(range(rows))
+
+    async def writer():
+        while queue:
+            await create(sample_record(queue.pop()))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    return time.perf_counter() - started
+
+async def benchmark(repo, rows: int, writers: int) -> dict:
+    await clear(repo)
+    started = time.perf_counter()
+    for i in range(rows):
+        await repo.create(sample_record(i))
+    timings = {"create": time.perf_counter() - started}
+
+    await clear(repo)
+    timings["create_concurrent"] = await concurrent_creates(repo.create, rows, writers)
+    await clear(repo)
+    coalescer = WriteCoalescer(repo)
+    timings["create_batched"] = await concurrent_creates(coalescer.submit, rows, writers)
+    await coalescer.close()
+
+    started = time.perf_counter()
+    for _ in range(20):
+        await repo.list(0, 100)
+    timings["list_100"] = (time.perf_counter() - started) / 20
+
+    started = time.perf_counter()
+    for _ in range(20):
+        await repo.summary()
+    timings["summary"] = (time.perf_counter() - started) / 20
+
+    await clear(repo)
+    return timings
+
+async def run(backends, rows, writers):
+    for backend in backends:
+        if backend == "sqlite":
+            os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+        repo = get_repository(backend)
+        await repo.startup()
+        try:
+            timings = await benchmark(repo, rows, writers)
+        finally:
+            await repo.close()
+        print(f"{backend:8} create x{rows}: {timings['create']:.3f}s  "
+              f"{writers} writers: {timings['create_concurrent']:.3f}s  "
+              f"{writers} writers batched: {timings['create_batched']:.3f}s  "
+              f"list(100): {timings['list_100'] * 1000:.2f}ms  summary: {timings['summary'] * 1000:.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("backends", nargs="*", default=["sqlite"])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--writers", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.backends, args.rows, args.writers))
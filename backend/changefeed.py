@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from agreements import AGREEMENT_FIELDS
+from storage import AgreementRepository
+
+logger = logging.getLogger(__name__)
+
+# Event types: create, update, delete carry the changed agreements (delete only their ids);
+# resync tells clients to refetch because the change could not be described row by row.
+
+
+def row_hashes(rows: List[dict]) -> Dict[str, int]:
+    """Agreement id -> hash of the row's contents"""
+    return {
+        row['id']: int.from_bytes(
+            hashlib.blake2b(json.dumps(row, sort_keys=True, default=str).encode(), digest_size=8).digest(), "big"
+        )
+        for row in rows
+    }
+
+
+class ChangeFeed:
+    """
+    Fan-out of agreement changes to connected stream clients.
+
+    Changes come from the repository's write notifications or, for Mongo
+    deployments with a replica set, from a change stream (which also sees
+    writes made by other app instances). Each change is published once with
+    the summary totals computed after it, so clients can apply the delta
+    instead of refetching the register.
+
+    Without a change stream, writes by other workers or instances are found
+    by polling: every `poll_interval` seconds, while clients are connected,
+    the rows are hashed and compared with the previous poll. Rows that
+    changed (or appeared or disappeared) without a local notification
+    produce a resync.
+    """
+
+    def __init__(self, storage: AgreementRepository, client_queue_size: int = 100, poll_interval: float = 5.0):
+        self.storage = storage
+        self.client_queue_size = client_queue_size
+        self.poll_interval = poll_interval
+        self._clients: Set[asyncio.Queue] = set()
+        self._changes: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.using_change_stream = False
+        self._hashes: Optional[Dict[str, int]] = None
+        # Ids written locally during the current and the previous poll interval (None: a local resync)
+        self._local_ids: Optional[Set[str]] = set()
+        self._previous_local_ids: Optional[Set[str]] = set()
+
+    async def start(self) -> None:
+        self._changes = asyncio.Queue()
+        self.storage.add_listener(self._local_change)
+        self._tasks.append(asyncio.create_task(self._publish_changes()))
+        if hasattr(self.storage, "watch_changes"):
+            self._tasks.append(asyncio.create_task(self._watch()))
+        if self.poll_interval > 0:
+            self._tasks.append(asyncio.create_task(self._poll()))
+
+    async def close(self) -> None:
+        self.storage.remove_listener(self._local_change)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _local_change(self, change_type: str, rows: List[dict]) -> None:
+        if not self.using_change_stream and self._changes is not None:
+            self._changes.put_nowait((change_type, rows))
+            if change_type == "resync":
+                self._local_ids = None
+            elif self._local_ids is not None:
+                self._local_ids.update(row['id'] for row in rows)
+
+    async def _watch(self) -> None:
+        def started():
+            self.using_change_stream = True
+            logger.info("Change feed following the Mongo change stream")
+
+        try:
+            async for change_type, rows in self.storage.watch_changes(started):
+                self._changes.put_nowait((change_type, rows))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Standalone servers have no change streams; local write notifications take over
+            logger.info("Mongo change stream unavailable (%s), using write notifications", exc)
+        finally:
+            self.using_change_stream = False
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self.using_change_stream or not self._clients:
+                self._hashes = None
+                continue
+            try:
+                hashes = await run_in_threadpool(row_hashes, await self.storage.fetch_columns(AGREEMENT_FIELDS))
+            except Exception:
+                logger.exception("Could not poll for changes")
+                continue
+            # A local write may commit just before or after the read, so the previous interval's ids count too
+            local_ids, previous_local_ids = self._local_ids, self._previous_local_ids
+            self._previous_local_ids, self._local_ids = local_ids, set()
+            if self._hashes is not None and local_ids is not None and previous_local_ids is not None:
+                changed = {i for i in hashes.keys() | self._hashes.keys() if hashes.get(i) != self._hashes.get(i)}
+                if changed - local_ids - previous_local_ids:
+                    logger.info("Agreements changed outside this app instance, sending resync")
+                    self._changes.put_nowait(("resync", []))
+            self._hashes = hashes
+
+    async def _publish_changes(self) -> None:
+        while True:
+            change_type, rows = await self._changes.get()
+            if not self._clients:
+                continue
+            try:
+                summary = await self.storage.summary()
+            except Exception:
+                logger.exception("Could not compute summary for change event")
+                summary = None
+            self._broadcast({"type": change_type, "agreements": rows, "summary": summary})
+
+    def _broadcast(self, event: dict) -> None:
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A client that cannot keep up drops its backlog and refetches
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync", "agreements": [], "summary": None})
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(self.client_queue_size)
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._clients.discard(queue)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
@@ -0,0 +1,256 @@
+"""
+Bulk importer for agreement registers in the warehouse.csv layout.
+
+    python import_agreements.py warehouse.csv --concurrency 4 --chunk-size 50
+    python import_agreements.py warehouse.csv --direct
+
+Rows are sent in chunks to POST /api/agreements/import (or written straight
+through the storage repository with --direct), which upserts on
+survey_no + doc_no_1, so re-running an import never duplicates agreements.
+Completed chunks are recorded in a checkpoint file; an interrupted import
+picks up where it stopped.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+import pandas as pd
+from dateutil import parser as date_parser
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger("import_agreements")
+
+# API field -> CSV column (headers are stripped of surrounding spaces)
+COLUMNS = {
+    "survey_no": "Servey No.",
+    "firm_name": "Firm Name",
+    "land_owner": "Land Owner",
+    "area": "Area",
+    "doc_no_1": "Doc. No.",
+    "agreement_date": "Date",
+    "development_months": "Development Period in months",
+    "possession_status": "Possation Status",
+    "rent_per_sqft": "Commited Rent in Rs./Sqft",
+    "free_area_bu": "Free Area (DA) - BU",
+    "free_area_cp": "Free Area (DA) - CP",
+    "agreement_value": "Agreement Value",
+    "deposit_da": "Deposit (DA)",
+    "stamp_duty_1": "Stamp duty",
+    "regi_dd_1": "Regi. D.D.",
+    "handling_charges_1": "Handling Charges",
+    "adjudication_1": "Adjudication",
+    "legal_expenses_1": "Legal & other Exp.",
+    "doc_no_2": "Doc. No.(POA)",
+    "date_2": "Date(POA)",
+    "stamp_duty_2": "Stamp duty(POA)",
+    "regi_dd_2": "Regi. D.D.(POA)",
+    "handling_charges_2": "Handling Charges(POA)",
+    "legal_expenses_2": "Legal & other Exp.(POA)",
+    "doc_no_3": "Doc. No.(A3)",
+    "stamp_duty_3": "Stamp duty(A3)",
+    "regi_dd_3": "Regi. D.D.(A3)",
+    "handling_charges_3": "Handling Charges(A3)",
+}
+
+TEXT_FIELDS = {"survey_no", "firm_name", "land_owner", "area", "doc_no_1", "possession_status", "doc_no_2", "doc_no_3"}
+DATE_FIELDS = {"agreement_date", "date_2"}
+INT_FIELDS = {"development_months"}
+
+# Status codes worth retrying: rate limiting, overload and transient server errors
+RETRY_STATUS = {409, 429, 500, 502, 503, 504}
+
+# ---------- HELPERS ----------
+def safe_str(val) -> str:
+    if val is None or (isinstance(val, float) and math.isnan(val)):
+        return ""
+    return str(val).strip()
+
+def safe_float(val) -> float:
+    # Register amounts look like "  408,000.00 "; blanks and "-" mean zero
+    text = safe_str(val).replace(",", "")
+    if text in ("", "-"):
+        return 0.0
+    return float(text)
+
+def safe_int(val) -> int:
+    return int(safe_float(val))
+
+def parse_date(val, date_format: str) -> str:
+    text = safe_str(val)
+    if not text:
+        return ""
+    try:
+        date_obj = datetime.strptime(text, date_format)
+    except ValueError:
+        date_obj = date_parser.parse(text, dayfirst=True)
+    return date_obj.strftime("%d-%m-%Y")
+
+def load_payloads(csv_file: str, date_format: str) -> List[dict]:
+    df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+    df.columns = df.columns.str.strip()
+
+    payloads = []
+    for _, row in df.iterrows():
+        payload = {}
+        for field, column in COLUMNS.items():
+            value = row.get(column)
+            if field in TEXT_FIELDS:
+                payload[field] = safe_str(value)
+            elif field in DATE_FIELDS:
+                payload[field] = parse_date(value, date_format)
+            elif field in INT_FIELDS:
+                payload[field] = safe_int(value)
+            else:
+                payload[field] = safe_float(value)
+        payloads.append(payload)
+    return payloads
+
+def file_digest(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class Checkpoint:
+    """Chunk indices already imported, tied to the exact CSV contents and chunk size"""
+
+    def __init__(self, path: str, digest: str, chunk_size: int):
+        self.path = path
+        self.key = f"{digest}:{chunk_size}"
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("key") == self.key:
+                self.done = set(data.get("done", []))
+            else:
+                logger.info("Checkpoint %s belongs to another file or chunk size, starting over", path)
+
+    def mark(self, index: int) -> None:
+        self.done.add(index)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key": self.key, "done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def with_retries(send, retries: int, backoff: float, retry_on: Tuple[type, ...]):
+    """
+    Run `send` until it succeeds, sleeping with exponential backoff and
+    jitter between attempts. Only `retry_on` errors are retried; anything
+    else (a rejected row, a bug) fails on the first attempt.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await send()
+        except retry_on as exc:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            logger.warning("Attempt %d failed (%s), retrying in %.2fs", attempt + 1, exc, delay)
+            await asyncio.sleep(delay)
+
+
+class RetryableStatus(Exception):
+    """The API answered with one of RETRY_STATUS"""
+
+
+def http_sender(client, url: str):
+    async def send(chunk: List[dict]) -> dict:
+        response = await client.post(url, json=chunk)
+        if response.status_code in RETRY_STATUS:
+            raise RetryableStatus(f"HTTP {response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+        return response.json()
+    return send
+
+def direct_sender(storage):
+    from agreements import AgreementCreate, build_agreement_record
+    from storage import NATURAL_KEY
+
+    async def send(chunk: List[dict]) -> dict:
+        records = {}
+        for payload in chunk:
+            record = build_agreement_record(AgreementCreate(**payload))
+            records[tuple(record[field] for field in NATURAL_KEY)] = record
+        return await storage.import_records(list(records.values()))
+    return send
+
+
+async def run_import(args) -> None:
+    payloads = load_payloads(args.csv_file, args.date_format)
+    chunks = [payloads[i:i + args.chunk_size] for i in range(0, len(payloads), args.chunk_size)]
+    checkpoint = Checkpoint(args.checkpoint or f"{args.csv_file}.checkpoint.json", file_digest(args.csv_file), args.chunk_size)
+    pending = [i for i in range(len(chunks)) if i not in checkpoint.done]
+    logger.info("%d rows in %d chunks, %d already imported", len(payloads), len(chunks), len(chunks) - len(pending))
+
+    totals = {"created": 0, "updated": 0}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def import_chunk(send, retry_on, index: int) -> None:
+        async with semaphore:
+            result = await with_retries(lambda: send(chunks[index]), args.retries, args.backoff, retry_on)
+        totals["created"] += result["created"]
+        totals["updated"] += result["updated"]
+        checkpoint.mark(index)
+        logger.info("Chunk %d/%d done (%d created, %d updated)", index + 1, len(chunks), result["created"], result["updated"])
+
+    if args.direct:
+        from storage import DuplicateAgreementError, get_repository
+
+        storage = get_repository()
+        await storage.startup()
+        try:
+            # A duplicate here is a concurrent import of the same rows (HTTP 409 on the API path)
+            send, retry_on = direct_sender(storage), (DuplicateAgreementError,)
+            results = await asyncio.gather(*(import_chunk(send, retry_on, i) for i in pending), return_exceptions=True)
+        finally:
+            await storage.close()
+    else:
+        import httpx
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+            send = http_sender(client, f"{args.api_url.rstrip('/')}/agreements/import")
+            retry_on = (RetryableStatus, httpx.TransportError)
+            results = await asyncio.gather(*(import_chunk(send, retry_on, i) for i in pending), return_exceptions=True)
+
+    # Other chunks finish (and are checkpointed) before the first failure is raised
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        logger.error("%d of %d chunks failed; re-run to import them", len(errors), len(pending))
+        raise errors[0]
+    checkpoint.clear()
+    logger.info("Import finished: %d created, %d updated", totals["created"], totals["updated"])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("csv_file", nargs="?", default=str(ROOT_DIR / "warehouse.csv"))
+    arg_parser.add_argument("--api-url", default=os.environ.get("API_URL", "http://localhost:8000/api"))
+    arg_parser.add_argument("--direct", action="store_true", help="write through the configured storage backend instead of the API")
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--chunk-size", type=int, default=50)
+    arg_parser.add_argument("--retries", type=int, default=5)
+    arg_parser.add_argument("--backoff", type=float, default=0.5, help="initial retry delay in seconds")
+    arg_parser.add_argument("--timeout", type=float, default=30.0)
+    arg_parser.add_argument("--checkpoint", help="checkpoint file (default: <csv_file>.checkpoint.json)")
+    arg_parser.add_argument("--date-format", default="%m/%d/%Y", help="format of the CSV dates")
+    asyncio.run(run_import(arg_parser.parse_args()))
@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import Float, Integer
+
+from agreements import DashboardSummary
+from storage import AgreementRepository, agreements_table, empty_summary
+
+logger = logging.getLogger(__name__)
+
+# Every numeric AgreementDB column is held as a NumPy array
+NUMERIC_COLUMNS = {
+    column.name: np.int64 if isinstance(column.type, Integer) else np.float64
+    for column in agreements_table.columns
+    if isinstance(column.type, (Float, Integer))
+}
+# Low-cardinality text columns, stored as int32 codes into a per-column dictionary
+DICTIONARY_COLUMNS = ('firm_name', 'land_owner', 'possession_status')
+STORE_FIELDS = ['id', *DICTIONARY_COLUMNS, *NUMERIC_COLUMNS]
+
+# Relative tolerance when comparing column sums with the database (MySQL FLOAT is single precision)
+DRIFT_TOLERANCE = 1e-6
+
+
+# Models
+class BreakdownGroup(BaseModel):
+    key: str
+    totals: DashboardSummary
+
+class Breakdown(BaseModel):
+    by: str
+    groups: List[BreakdownGroup]
+
+class StoreDrift(BaseModel):
+    in_sync: bool
+    store_rows: int
+    database_rows: int
+    missing_ids: int
+    unexpected_ids: int
+    columns: List[str]
+
+class StoreStats(BaseModel):
+    rows: int
+    capacity: int
+    array_bytes: int
+    memory_bytes: int
+    dictionary_sizes: Dict[str, int]
+    drift: Optional[StoreDrift] = None
+
+
+def _id_checksum(ids) -> int:
+    """Order-independent checksum of a set of agreement ids"""
+    total = 0
+    for agreement_id in ids:
+        total += int.from_bytes(hashlib.blake2b(agreement_id.encode(), digest_size=8).digest(), "big")
+    return total % (1 << 64)
+
+
+class PortfolioStore:
+    """
+    In-process columnar copy of the agreements for dashboard reads.
+
+    Loaded once at startup and kept current from the repository's write
+    notifications, so the summary and group-by breakdowns are a few NumPy
+    reductions instead of a database round trip. Rows are packed densely
+    (a delete moves the last row into the gap); "resync" notifications and
+    writes made by other app instances are picked up by reloading, which
+    verify() tells you is needed. From a resync until its reload finishes
+    the store is stale and `ready` is False, so callers read the database.
+    """
+
+    def __init__(self, storage: AgreementRepository, initial_capacity: int = 1024):
+        self.storage = storage
+        self.loaded = False
+        self.stale = False
+        self._reloading = False
+        self._reload_again = False
+        self._pending: List[tuple] = []
+        self._reload_task: Optional[asyncio.Task] = None
+        self._reset(initial_capacity)
+
+    def _reset(self, capacity: int) -> None:
+        self.size = 0
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.numeric = {name: np.zeros(capacity, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        self.codes = {name: np.zeros(capacity, dtype=np.int32) for name in DICTIONARY_COLUMNS}
+        self.dictionaries: Dict[str, List[str]] = {name: [] for name in DICTIONARY_COLUMNS}
+        self._lookups: Dict[str, Dict[str, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+
+    @property
+    def ready(self) -> bool:
+        """Loaded and not missing a set-based write (safe to answer reads from)"""
+        return self.loaded and not self.stale
+
+    @property
+    def capacity(self) -> int:
+        return len(self.codes[DICTIONARY_COLUMNS[0]])
+
+    # ---------- LOADING AND SYNC ----------
+    async def load(self) -> None:
+        """(Re)build the columns from the database; writes seen meanwhile are replayed on top"""
+        if self._reloading:
+            self._reload_again = True
+            return
+        self._reloading = True
+        try:
+            while True:
+                self._reload_again = False
+                self._pending = []
+                rows = await self.storage.fetch_columns(STORE_FIELDS)
+                self._reset(max(len(rows) * 2, 1024))
+                for row in rows:
+                    self._upsert_row(row)
+                # Replays are idempotent, so changes already in `rows` are harmless
+                for change_type, changed in self._pending:
+                    self._apply(change_type, changed)
+                if not self._reload_again:
+                    break
+            self.loaded = True
+            self.stale = False
+            logger.info("Portfolio store loaded %d agreements (%d bytes)", self.size, self.memory_bytes())
+        finally:
+            self._reloading = False
+            self._pending = []
+
+    async def close(self) -> None:
+        self.storage.remove_listener(self.on_change)
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            await asyncio.gather(self._reload_task, return_exceptions=True)
+
+    def on_change(self, change_type: str, rows: List[dict]) -> None:
+        """Repository listener: apply a committed write to the columns"""
+        if change_type == "resync":
+            # The write is committed but not in the columns until the reload finishes
+            self.stale = True
+            self._reload_task = asyncio.ensure_future(self.load())
+        elif self._reloading:
+            self._pending.append((change_type, rows))
+        else:
+            self._apply(change_type, rows)
+
+    def _apply(self, change_type: str, rows: List[dict]) -> None:
+        if change_type == "delete":
+            for row in rows:
+                self._remove_row(row['id'])
+        else:
+            for row in rows:
+                self._upsert_row(row)
+
+    def _encode(self, name: str, value: Optional[str]) -> int:
+        value = value or ""
+        code = self._lookups[name].get(value)
+        if code is None:
+            code = len(self.dictionaries[name])
+            self.dictionaries[name].append(value)
+            self._lookups[name][value] = code
+        return code
+
+    def _grow(self) -> None:
+        capacity = self.capacity * 2
+        for columns in (self.numeric, self.codes):
+            for name, values in columns.items():
+                grown = np.zeros(capacity, dtype=values.dtype)
+                grown[:self.size] = values[:self.size]
+                columns[name] = grown
+
+    def _upsert_row(self, row: dict) -> None:
+        i = self.index.get(row['id'])
+        if i is None:
+            if self.size == self.capacity:
+                self._grow()
+            i = self.size
+            self.size += 1
+            self.ids.append(row['id'])
+            self.index[row['id']] = i
+        for name, values in self.numeric.items():
+            values[i] = row.get(name) or 0
+        for name, codes in self.codes.items():
+            codes[i] = self._encode(name, row.get(name))
+
+    def _remove_row(self, agreement_id: str) -> None:
+        i = self.index.pop(agreement_id, None)
+        if i is None:
+            return
+        last = self.size - 1
+        if i != last:
+            for columns in (self.numeric, self.codes):
+                for values in columns.values():
+                    values[i] = values[last]
+            self.ids[i] = self.ids[last]
+            self.index[self.ids[i]] = i
+        self.ids.pop()
+        self.size = last
+
+    # ---------- QUERIES ----------
+    def _mask(self, filters: Dict[str, str]) -> Optional[np.ndarray]:
+        """Rows matching every dictionary-column filter (None when there are no filters)"""
+        mask = None
+        for name, value in filters.items():
+            code = self._lookups[name].get(value)
+            matches = self.codes[name][:self.size] == code if code is not None else np.zeros(self.size, dtype=bool)
+            mask = matches if mask is None else mask & matches
+        return mask
+
+    def summary(self, filters: Optional[Dict[str, str]] = None) -> dict:
+        """Same totals as AgreementRepository.summary(), optionally for matching rows only"""
+        mask = self._mask(filters or {})
+
+        def total(name: str) -> float:
+            values = self.numeric[name][:self.size]
+            return float(values[mask].sum() if mask is not None else values.sum())
+
+        if self.size == 0:
+            return empty_summary()
+        expenses = total('total_agreement_expense')
+        return {
+            'total_land_count': int(mask.sum()) if mask is not None else self.size,
+            'total_area_guntas': total('area_in_guntas'),
+            'total_free_bu_area': total('free_area_bu'),
+            'total_rent_value': total('total_rent'),
+            'total_agreement_expenses': expenses,
+            'net_project_cost': expenses + total('deposit_da'),
+        }
+
+    def breakdown(self, by: str, filters: Optional[Dict[str, str]] = None) -> Breakdown:
+        """Summary totals per distinct value of a dictionary column"""
+        codes = self.codes[by][:self.size]
+        mask = self._mask(filters or {})
+        if mask is not None:
+            codes = codes[mask]
+        groups = len(self.dictionaries[by])
+
+        def totals(name: str) -> np.ndarray:
+            values = self.numeric[name][:self.size]
+            return np.bincount(codes, weights=values[mask] if mask is not None else values, minlength=groups)
+
+        counts = np.bincount(codes, minlength=groups)
+        area, free_bu, rent = totals('area_in_guntas'), totals('free_area_bu'), totals('total_rent')
+        expenses, deposits = totals('total_agreement_expense'), totals('deposit_da')
+        result = [
+            BreakdownGroup(key=self.dictionaries[by][code], totals=DashboardSummary(
+                total_land_count=int(counts[code]),
+                total_area_guntas=float(area[code]),
+                total_free_bu_area=float(free_bu[code]),
+                total_rent_value=float(rent[code]),
+                total_agreement_expenses=float(expenses[code]),
+                net_project_cost=float(expenses[code] + deposits[code]),
+            ))
+            for code in np.flatnonzero(counts)
+        ]
+        result.sort(key=lambda group: group.totals.total_land_count, reverse=True)
+        return Breakdown(by=by, groups=result)
+
+    # ---------- FOOTPRINT AND DRIFT ----------
+    def array_bytes(self) -> int:
+        return sum(values.nbytes for columns in (self.numeric, self.codes) for values in columns.values())
+
+    def memory_bytes(self) -> int:
+        """Arrays plus the id index and dictionaries (Python object overhead included)"""
+        total = self.array_bytes()
+        total += sys.getsizeof(self.ids) + sys.getsizeof(self.index)
+        total += sum(sys.getsizeof(agreement_id) for agreement_id in self.ids)
+        for name in DICTIONARY_COLUMNS:
+            total += sys.getsizeof(self.dictionaries[name]) + sys.getsizeof(self._lookups[name])
+            total += sum(sys.getsizeof(value) for value in self.dictionaries[name])
+        return total
+
+    def checksum(self) -> dict:
+        """Row count, id-set checksum and per-column sums (numeric and dictionary-coded)"""
+        sums = {name: float(values[:self.size].sum()) for name, values in self.numeric.items()}
+        for name in DICTIONARY_COLUMNS:
+            lengths = np.array([len(value) for value in self.dictionaries[name]], dtype=np.int64)
+            sums[name] = float(lengths[self.codes[name][:self.size]].sum()) if self.size else 0.0
+        return {'rows': self.size, 'ids': _id_checksum(self.ids), 'sums': sums}
+
+    async def verify(self) -> StoreDrift:
+        """Compare the store's checksum with one computed from a fresh database read"""
+        rows = await self.storage.fetch_columns(STORE_FIELDS)
+        mine = self.checksum()
+        sums = {name: float(sum(row.get(name) or 0 for row in rows)) for name in NUMERIC_COLUMNS}
+        for name in DICTIONARY_COLUMNS:
+            sums[name] = float(sum(len(row.get(name) or "") for row in rows))
+
+        database_ids = {row['id'] for row in rows}
+        drifted = [
+            name for name, value in sums.items()
+            if not math.isclose(mine['sums'][name], value, rel_tol=DRIFT_TOLERANCE, abs_tol=DRIFT_TOLERANCE)
+        ]
+        ids_match = mine['ids'] == _id_checksum(database_ids) and mine['rows'] == len(rows)
+        return StoreDrift(
+            in_sync=ids_match and not drifted,
+            store_rows=self.size,
+            database_rows=len(rows),
+            missing_ids=len(database_ids - self.index.keys()),
+            unexpected_ids=len(self.index.keys() - database_ids),
+            columns=drifted,
+        )
+
+    def stats(self) -> StoreStats:
+        return StoreStats(
+            rows=self.size,
+            capacity=self.capacity,
+            array_bytes=self.array_bytes(),
+            memory_bytes=self.memory_bytes(),
+            dictionary_sizes={name: len(values) for name, values in self.dictionaries.items()},
+        )
+
+
+def get_portfolio_store(storage: AgreementRepository) -> Optional[PortfolioStore]:
+    """Build the store when PORTFOLIO_STORE is enabled"""
+    if os.environ.get("PORTFOLIO_STORE", "").lower() not in ("1", "true", "yes"):
+        return None
+    return PortfolioStore(storage)
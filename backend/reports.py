@@ -0,0 +1,346 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from agreements import AGREEMENT_FIELDS
+from storage import AgreementRepository
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rendered output changes, so cached artifacts are rebuilt
+RENDERER_VERSION = 1
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+# Models
+class ReportRequest(BaseModel):
+    report_type: Literal["register", "rent_statements", "expenses"]
+    format: Literal["xlsx", "pdf"] = "xlsx"
+
+class ReportJob(BaseModel):
+    id: str
+    report_type: str
+    format: str
+    status: str  # pending | done | failed
+    cached: bool = False
+    created_at: str
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
+
+
+# ---------- REPORT CONTENT ----------
+# A section is (title, headers, rows); the last row of a section may be a totals row
+Section = Tuple[str, List[str], List[list]]
+
+# Register columns in the warehouse.csv layout: header -> field, or a function of the row
+REGISTER_COLUMNS = [
+    ("Servey No.", "survey_no"),
+    ("Firm Name", "firm_name"),
+    ("Land Owner", "land_owner"),
+    ("Area", "area"),
+    ("Area in Guntas", "area_in_guntas"),
+    ("Agreement Type 01", lambda row: "DEVELOPMENT AGR." if row['doc_no_1'] else ""),
+    ("Doc. No.", "doc_no_1"),
+    ("Date", "agreement_date"),
+    ("Development Period in months", "development_months"),
+    ("Possation Status", "possession_status"),
+    ("Possation Date", lambda row: ""),
+    ("Commited Rent in Rs./Sqft", "rent_per_sqft"),
+    ("Total Months", "total_months"),
+    ("Total Rent", "total_rent"),
+    ("Agreement Value", "agreement_value"),
+    ("Deposit (DA)", "deposit_da"),
+    ("Real Value for hectare", "real_value_per_acre"),
+    ("Free Area (DA) - BU", "free_area_bu"),
+    ("Free Area (DA) - CP", "free_area_cp"),
+    ("Stamp duty", "stamp_duty_1"),
+    ("Regi. D.D.", "regi_dd_1"),
+    ("Handling Charges", "handling_charges_1"),
+    ("Adjudication", "adjudication_1"),
+    ("Legal & other Exp.", "legal_expenses_1"),
+    ("Agreement Type 02", lambda row: "POWER OF ATTORNEY" if row['doc_no_2'] else ""),
+    ("Doc. No.(POA)", "doc_no_2"),
+    ("Date(POA)", "date_2"),
+    ("Stamp duty(POA)", "stamp_duty_2"),
+    ("Regi. D.D.(POA)", "regi_dd_2"),
+    ("Handling Charges(POA)", "handling_charges_2"),
+    ("Legal & other Exp.(POA)", "legal_expenses_2"),
+    ("Doc. No.(A3)", "doc_no_3"),
+    ("Date", lambda row: ""),
+    ("Agreement Type 03(A3)", lambda row: ""),
+    ("Stamp duty(A3)", "stamp_duty_3"),
+    ("Regi. D.D.(A3)", "regi_dd_3"),
+    ("Handling Charges(A3)", "handling_charges_3"),
+    ("Total", "total_agreement_expense"),
+]
+
+RENT_COLUMNS = [
+    ("Servey No.", "survey_no"),
+    ("Land Owner", "land_owner"),
+    ("Doc. No.", "doc_no_1"),
+    ("Development End", "development_end_date"),
+    ("Possation Status", "possession_status"),
+    ("Rent Rs./Sqft", "rent_per_sqft"),
+    ("Free Area (DA) - BU", "free_area_bu"),
+    ("Total Months", "total_months"),
+    ("Total Rent", "total_rent"),
+]
+
+EXPENSE_COLUMNS = [
+    ("Servey No.", "survey_no"),
+    ("Firm Name", "firm_name"),
+    ("Doc. No.", "doc_no_1"),
+    ("Agreement 1", "agreement_1_expense"),
+    ("Agreement 2 (POA)", "agreement_2_expense"),
+    ("Agreement 3 (A3)", "agreement_3_expense"),
+    ("Total", "total_agreement_expense"),
+]
+
+
+def _table(rows: List[dict], columns, totals: List[str] = ()) -> Tuple[List[str], List[list]]:
+    headers = [header for header, _ in columns]
+    body = [[field(row) if callable(field) else row[field] for _, field in columns] for row in rows]
+    if totals:
+        body.append([
+            "Total" if i == 0 else (sum(row[field] or 0 for row in rows) if field in totals else "")
+            for i, (_, field) in enumerate(columns)
+        ])
+    return headers, body
+
+
+def register_sections(rows: List[dict]) -> List[Section]:
+    rows = sorted(rows, key=lambda row: (row['created_at'], row['id']))
+    headers, body = _table(rows, REGISTER_COLUMNS)
+    return [("Register", ["Sr. No.", *headers], [[i, *values] for i, values in enumerate(body, 1)])]
+
+
+def rent_statement_sections(rows: List[dict]) -> List[Section]:
+    firms: Dict[str, List[dict]] = {}
+    for row in sorted(rows, key=lambda row: (row['firm_name'] or "", row['survey_no'])):
+        firms.setdefault(row['firm_name'] or "(no firm)", []).append(row)
+    return [
+        (firm, *_table(firm_rows, RENT_COLUMNS, totals=["free_area_bu", "total_rent"]))
+        for firm, firm_rows in firms.items()
+    ]
+
+
+def expense_sections(rows: List[dict]) -> List[Section]:
+    rows = sorted(rows, key=lambda row: (row['firm_name'] or "", row['survey_no']))
+    totals = ["agreement_1_expense", "agreement_2_expense", "agreement_3_expense", "total_agreement_expense"]
+    return [("Expenses", *_table(rows, EXPENSE_COLUMNS, totals=totals))]
+
+
+REPORTS = {
+    "register": register_sections,
+    "rent_statements": rent_statement_sections,
+    "expenses": expense_sections,
+}
+
+
+# ---------- RENDERING (runs in the worker processes) ----------
+def _sheet_title(title: str, used: set) -> str:
+    # Excel sheet names: at most 31 characters, unique, none of []:*?/\
+    base = "".join("_" if ch in '[]:*?/\\' else ch for ch in title)[:31] or "Sheet"
+    name, n = base, 1
+    while name.lower() in used:
+        n += 1
+        name = f"{base[:31 - len(str(n)) - 1]}~{n}"
+    used.add(name.lower())
+    return name
+
+
+def render_xlsx(sections: List[Section], path: str) -> None:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    used = set()
+    for title, headers, rows in sections:
+        sheet = workbook.create_sheet(_sheet_title(title, used))
+        sheet.append(headers)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def render_pdf(sections: List[Section], path: str) -> None:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A3, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import LongTable, PageBreak, Paragraph, SimpleDocTemplate, TableStyle
+
+    styles = getSampleStyleSheet()
+    story = []
+    for i, (title, headers, rows) in enumerate(sections):
+        if i:
+            story.append(PageBreak())
+        story.append(Paragraph(title, styles["Heading2"]))
+        cells = [headers] + [[f"{value:,.2f}" if isinstance(value, float) else value for value in row] for row in rows]
+        table = LongTable(cells, repeatRows=1)
+        table.setStyle(TableStyle([
+            ("FONTSIZE", (0, 0), (-1, -1), 5 if len(headers) > 12 else 8),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("ALIGN", (0, 1), (-1, -1), "RIGHT"),
+        ]))
+        story.append(table)
+    SimpleDocTemplate(path, pagesize=landscape(A3)).build(story)
+
+
+def render_report(report_type: str, fmt: str, rows: List[dict], path: str) -> str:
+    """Render a report to `path`; written to a temporary file first so readers never see a partial one"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    sections = REPORTS[report_type](rows)
+    (render_xlsx if fmt == "xlsx" else render_pdf)(sections, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def collection_version(rows: List[dict]) -> str:
+    """Digest of the agreements a report is built from; changes whenever the data does"""
+    canonical = json.dumps(sorted(rows, key=lambda row: row['id']), sort_keys=True, default=str)
+    return hashlib.sha256(f"{RENDERER_VERSION}:{canonical}".encode()).hexdigest()
+
+
+# ---------- JOBS ----------
+class ReportService:
+    """
+    Renders reports in a process pool so request handlers stay responsive.
+
+    Artifacts are cached on disk as <type>-<collection version>.<format>:
+    a request for data that has not changed since the last render is done
+    immediately, and identical requests while a render is running share it.
+    The version is a digest of a fresh read, so writes by any worker,
+    instance or script are seen; only the render is cached. Jobs are
+    tracked in memory, so polling must reach the same app process.
+    """
+
+    def __init__(self, storage: AgreementRepository, directory: str, max_workers: int = 2, max_jobs: int = 200):
+        self.storage = storage
+        self.directory = Path(directory)
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._reads = itertools.count()
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._paths: Dict[str, Path] = {}
+        self._rendering: Dict[Path, str] = {}
+        # (report type, format) -> (read number, path) of the newest version requested
+        self._latest: Dict[Tuple[str, str], Tuple[int, Path]] = {}
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # spawn: forking a process that runs threads and an event loop is not safe
+        self.executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _render(self, *args):
+        try:
+            return asyncio.get_running_loop().run_in_executor(self.executor, render_report, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool rather than failing every later job
+            logger.warning("Report process pool is broken, starting a new one")
+            self.close()
+            self.start()
+            return asyncio.get_running_loop().run_in_executor(self.executor, render_report, *args)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _add_job(self, job: ReportJob, path: Path) -> ReportJob:
+        self._jobs[job.id] = job
+        self._paths[job.id] = path
+        # Forget the oldest finished jobs (their artifacts stay cached on disk)
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status != "pending":
+                del self._jobs[job_id]
+                del self._paths[job_id]
+        return job
+
+    def _finish(self, job: ReportJob, error: Optional[str] = None) -> None:
+        job.finished_at = datetime.now(timezone.utc).isoformat()
+        if error:
+            job.status, job.error = "failed", error
+        else:
+            job.status, job.download_url = "done", f"/api/reports/{job.id}/download"
+
+    async def submit(self, request: ReportRequest) -> ReportJob:
+        # Reads are numbered as they start, so a later number never holds older data
+        read = next(self._reads)
+        rows = await self.storage.fetch_columns(AGREEMENT_FIELDS)
+        # Hashing every row is CPU work; keep it off the event loop
+        version = await run_in_threadpool(collection_version, rows)
+        path = self.directory / f"{request.report_type}-{version[:24]}.{request.format}"
+
+        running = self._rendering.get(path)
+        if running is not None:
+            return self._jobs[running]
+
+        key = (request.report_type, request.format)
+        if key not in self._latest or self._latest[key][0] <= read:
+            self._latest[key] = (read, path)
+
+        job = ReportJob(
+            id=str(uuid.uuid4()),
+            report_type=request.report_type,
+            format=request.format,
+            status="pending",
+            created_at=datetime.now(timezone.utc).isoformat(),
+        )
+        self._add_job(job, path)
+        if path.exists():
+            job.cached = True
+            self._finish(job)
+            return job
+
+        self._rendering[path] = job.id
+        future = self._render(request.report_type, request.format, rows, str(path))
+        asyncio.ensure_future(self._wait(job, path, future))
+        return job
+
+    async def _wait(self, job: ReportJob, path: Path, future) -> None:
+        try:
+            await future
+        except Exception as exc:
+            logger.exception("Report %s (%s) failed", job.id, job.report_type)
+            self._finish(job, str(exc) or exc.__class__.__name__)
+        else:
+            self._finish(job)
+            # A render of older data that finishes late must not delete the newer artifact
+            if self._latest.get((job.report_type, job.format), (None, None))[1] == path:
+                self._prune(path)
+        finally:
+            self._rendering.pop(path, None)
+
+    def _prune(self, current: Path) -> None:
+        """Drop artifacts of older collection versions for the same report and format"""
+        report_type = current.name.split("-", 1)[0]
+        for path in self.directory.glob(f"{report_type}-*{current.suffix}"):
+            if path != current and path not in self._rendering:
+                path.unlink(missing_ok=True)
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self._jobs.get(job_id)
+
+    def artifact(self, job_id: str) -> Optional[Path]:
+        return self._paths.get(job_id)
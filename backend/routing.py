@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+# Per-request read routing state; None outside HTTP requests (startup, change feed, scripts)
+_request_state: ContextVar[Optional[dict]] = ContextVar("read_routing", default=None)
+
+
+def reads_from_primary() -> bool:
+    """Whether reads in the current context must go to the primary instead of a replica"""
+    state = _request_state.get()
+    # Background work has no client to pin and usually follows a write, so it reads the primary
+    return state is None or state["primary"]
+
+
+def record_write() -> None:
+    """Pin the current request (and, through its cookie, the client) to the primary"""
+    state = _request_state.get()
+    if state is not None:
+        state["primary"] = True
+        state["wrote"] = True
+
+
+@contextmanager
+def client_request(pinned: bool = False):
+    """Route reads for one client request; yields its state ({"primary", "wrote"})"""
+    state = {"primary": pinned, "wrote": False}
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Route request reads to the replica unless the client wrote recently.
+
+    A request that commits a write gets a short-lived cookie; while it is
+    valid the client's reads go to the primary, so replication lag never
+    hides the client's own changes from it.
+    """
+
+    def __init__(self, app, window: float = 5.0, cookie_name: str = "primary_until"):
+        self.app = app
+        self.window = window
+        self.cookie_name = cookie_name
+
+    def _pinned(self, scope) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                cookie = SimpleCookie()
+                cookie.load(value.decode("latin-1"))
+                morsel = cookie.get(self.cookie_name)
+                if morsel is not None:
+                    try:
+                        return float(morsel.value) > time.time()
+                    except ValueError:
+                        return False
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with client_request(self._pinned(scope)) as state:
+
+            async def send_with_pin(message):
+                if message["type"] == "http.response.start" and state["wrote"]:
+                    until = time.time() + self.window
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "set-cookie",
+                        f"{self.cookie_name}={until:.3f}; Max-Age={int(self.window) + 1}; Path=/; HttpOnly; SameSite=Lax",
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_pin)
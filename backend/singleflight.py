@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from routing import reads_from_primary
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Share one in-flight computation between identical concurrent reads.
+
+    A key is (name, *params); the first caller runs the computation and
+    everyone who asks for the same key before it finishes gets the same
+    result (or exception) instead of running their own query. Shared
+    results must be treated as read-only.
+
+    Calls only join computations started since the last committed write in
+    this process (see invalidate()) and with the same primary/replica
+    routing, so a client never receives data older than its own write.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self._tasks: Dict[tuple, asyncio.Future] = {}
+        self._futures: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.coalesced: Counter = Counter()
+
+    def invalidate(self, *_) -> None:
+        """Start a new generation; later calls no longer join earlier computations"""
+        self.generation += 1
+
+    def _flight_key(self, key: Tuple[Hashable, ...]) -> tuple:
+        return (*key, reads_from_primary(), self.generation)
+
+    def _count(self, name, joined: bool) -> None:
+        self.calls[name] += 1
+        if joined:
+            self.coalesced[name] += 1
+
+    async def run(self, key: Tuple[Hashable, ...], compute: Callable[[], Awaitable[T]]) -> T:
+        """Await compute() or the identical computation already running"""
+        flight_key = self._flight_key(key)
+        task = self._tasks.get(flight_key)
+        with self._lock:
+            self._count(key[0], task is not None)
+        if task is None:
+            # A separate task, so a caller that disconnects does not cancel it for the others
+            task = asyncio.ensure_future(compute())
+            self._tasks[flight_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(flight_key, None))
+        return await asyncio.shield(task)
+
+    def run_sync(self, key: Tuple[Hashable, ...], compute: Callable[[], T]) -> T:
+        """Blocking variant for code running in the threadpool"""
+        flight_key = self._flight_key(key)
+        with self._lock:
+            future = self._futures.get(flight_key)
+            leader = future is None
+            if leader:
+                future = self._futures[flight_key] = Future()
+            self._count(key[0], not leader)
+        if not leader:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._futures.pop(flight_key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": sum(self.calls.values()),
+                "coalesced": sum(self.coalesced.values()),
+                "in_flight": len(self._tasks) + len(self._futures),
+                "by_name": {name: {"calls": count, "coalesced": self.coalesced[name]} for name, count in self.calls.items()},
+            }
+
+
+# Shared by the repositories (reads) and the API routes (analytics)
+single_flight = SingleFlight()
@@ -0,0 +1,54 @@
+"use client"
+
+import { useEffect, useRef } from "react"
+
+const EVENT_TYPES = ["ready", "create", "update", "delete", "resync"]
+
+// Apply a create/update/delete event from /api/agreements/stream to a list of agreements.
+// "update" may carry rows the list has not seen yet (e.g. imports), so unknown ids are added.
+export function applyAgreementEvent(agreements, event) {
+  if (event.type === "delete") {
+    const removed = new Set(event.agreements.map((a) => a.id))
+    return agreements.filter((a) => !removed.has(a.id))
+  }
+  if (event.type !== "create" && event.type !== "update") {
+    return agreements
+  }
+
+  const changed = new Map(event.agreements.map((a) => [a.id, a]))
+  const next = agreements.map((a) => {
+    const row = changed.get(a.id)
+    if (!row) return a
+    changed.delete(a.id)
+    return row
+  })
+  // New rows first, matching the default created_at descending order
+  return [...changed.values(), ...next]
+}
+
+// Subscribe to live agreement changes; onEvent receives the parsed event
+// ({ type, agreements, summary }). "resync" means the caller should refetch.
+export function useAgreementStream(api, onEvent) {
+  const handlerRef = useRef(onEvent)
+  handlerRef.current = onEvent
+
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return undefined
+
+    const source = new EventSource(`${api}/agreements/stream`)
+    let connected = false
+    const listener = (message) => {
+      const event = JSON.parse(message.data)
+      if (event.type === "ready") {
+        // EventSource reconnects by itself after a drop or server restart; changes
+        // made while it was disconnected were never sent, so refetch instead
+        if (connected) event.type = "resync"
+        connected = true
+      }
+      handlerRef.current(event)
+    }
+    EVENT_TYPES.forEach((type) => source.addEventListener(type, listener))
+
+    return () => source.close()
+  }, [api])
+}
@@ -1,8 +1,13 @@
 import React from "react";
 import ReactDOM from "react-dom/client";
+import axios from "axios";
 import "@/index.css";
 import App from "@/App";
 
+// The API is on another origin; send its cookies so the read-your-writes pin
+// (primary_until) set after a create or edit reaches the refetch that follows
+axios.defaults.withCredentials = true;
+
 const root = ReactDOM.createRoot(document.getElementById("root"));
 root.render(
   <React.StrictMode>
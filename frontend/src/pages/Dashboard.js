@@ -22,6 +22,7 @@ import AddAgreementModal from "@/components/AddAgreementModal"
 import SpreadsheetView from "@/pages/SpreadsheetView"
 import { Toaster } from "@/components/ui/sonner"
 import { toast } from "sonner"
+import { applyAgreementEvent, useAgreementStream } from "@/hooks/use-agreement-stream"
 
 const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000"
 const API = `${BACKEND_URL}/api`
@@ -67,6 +68,16 @@ export default function Dashboard() {
     fetchData()
   }, [])
 
+  // Apply live changes instead of refetching the whole register
+  useAgreementStream(API, (event) => {
+    if (event.type === "resync") {
+      fetchData()
+      return
+    }
+    if (event.summary) setSummary(event.summary)
+    setAgreements((prev) => applyAgreementEvent(prev, event))
+  })
+
   const handleAgreementAdded = () => {
     setShowModal(false)
     fetchData()
@@ -10,6 +10,7 @@ import { ArrowUpDown, Pencil, Trash2, Plus, Search, Eye } from "lucide-react"
 import AddAgreementModal from "../components/AddAgreementModal"
 import ViewDetails from "../components/View-details" // Fixed import path to use correct lowercase view-details folder
 import { toast } from "sonner"
+import { applyAgreementEvent, useAgreementStream } from "@/hooks/use-agreement-stream"
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL
 const API = `${BACKEND_URL}/api`
@@ -30,6 +31,15 @@ export default function SpreadsheetView() {
     fetchAgreements()
   }, [])
 
+  // Apply live changes instead of refetching the whole register
+  useAgreementStream(API, (event) => {
+    if (event.type === "resync") {
+      fetchAgreements()
+      return
+    }
+    setAgreements((prev) => applyAgreementEvent(prev, event))
+  })
+
   const fetchAgreements = async () => {
     try {
       setLoading(true)
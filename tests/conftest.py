@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# main.py builds its repository at import time; API tests run it on a throwaway SQLite file
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "api.db")
+os.environ["REPORTS_DIR"] = tempfile.mkdtemp()
+
+from storage import get_repository  # noqa: E402
+
+from tests.samples import clear  # noqa: E402
+
+
+# MySQL and Mongo run only when pointed at scratch databases; every row is deleted
+BACKENDS = [
+    pytest.param("sqlite", id="sqlite"),
+    pytest.param("mysql", id="mysql", marks=pytest.mark.skipif(
+        not os.environ.get("DATABASE_URL"), reason="DATABASE_URL not set")),
+    pytest.param("mongo", id="mongo", marks=pytest.mark.skipif(
+        not (os.environ.get("MONGO_URL") and os.environ.get("DB_NAME")), reason="MONGO_URL/DB_NAME not set")),
+]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(params=BACKENDS)
+async def repo(request, tmp_path, monkeypatch):
+    if request.param == "sqlite":
+        monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "agreements.db"))
+        monkeypatch.delenv("SQLITE_READ_PATH", raising=False)
+    repository = get_repository(request.param)
+    await repository.startup()
+    await clear(repository)
+    try:
+        yield repository
+    finally:
+        await clear(repository)
+        await repository.close()
+
+
+@pytest.fixture
+def client():
+    """The app on its throwaway SQLite file, with every agreement deleted"""
+    import main
+    from fastapi.testclient import TestClient
+
+    with TestClient(main.app) as test_client:
+        for row in test_client.get("/api/agreements", params={"limit": 1000}).json():
+            test_client.delete(f"/api/agreements/{row['id']}")
+        yield test_client
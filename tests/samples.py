@@ -0,0 +1,33 @@
+"""Sample agreements shared by the tests and backend/bench_storage.py"""
+from agreements import AgreementCreate, build_agreement_record
+
+SAMPLE = {
+    "survey_no": "75/2/B",
+    "firm_name": "SAMPLE FIRM",
+    "land_owner": "SAMPLE OWNER",
+    "area": "0.23.5",
+    "doc_no_1": "3737/2013",
+    "agreement_date": "30-04-2013",
+    "development_months": 24,
+    "possession_status": "Pending",
+    "rent_per_sqft": 10.0,
+    "free_area_bu": 5500.0,
+    "free_area_cp": 4400.0,
+    "agreement_value": 117500.0,
+    "deposit_da": 9361.7,
+    "stamp_duty_1": 30000.0,
+    "regi_dd_1": 560.0,
+}
+
+
+def sample_payload(i: int, **changes) -> dict:
+    return {**SAMPLE, "survey_no": f"{i}/1", "rent_per_sqft": 10.0 + i, **changes}
+
+
+def sample_record(i: int, **changes) -> dict:
+    return build_agreement_record(AgreementCreate(**sample_payload(i, **changes)))
+
+
+async def clear(repo) -> None:
+    for row in await repo.list(0, 100000):
+        await repo.delete(row['id'])
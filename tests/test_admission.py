@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, classify
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "/api/", None),
+    ("GET", "/api/metrics", None),
+    ("GET", "/api/agreements/stream", None),
+    ("OPTIONS", "/api/agreements", None),
+    ("GET", "/docs", None),
+    ("GET", "/api/agreements", "reads"),
+    ("GET", "/api/dashboard/summary", "reads"),
+    ("POST", "/api/agreements", "writes"),
+    ("PATCH", "/api/agreements/bulk", "writes"),
+    ("DELETE", "/api/agreements/abc", "writes"),
+    ("GET", "/api/analytics/store", "analytics"),
+    ("GET", "/api/analytics/breakdown", "analytics"),
+    ("POST", "/api/analytics/simulate", "analytics"),
+    ("POST", "/api/reports", "analytics"),
+    ("GET", "/api/reports/job-1", "reads"),
+    ("GET", "/api/reports/job-1/download", "analytics"),
+])
+def test_classify(method, path, expected):
+    assert classify(method, path) == expected
+
+
+async def test_freed_slots_go_to_writes_first():
+    controller = AdmissionController({"writes": (1, 4, 5.0), "reads": (1, 4, 5.0)}, total_limit=1)
+    assert await controller.acquire("writes") is None
+
+    order = []
+
+    async def wait(name):
+        assert await controller.acquire(name) is None
+        order.append(name)
+
+    read = asyncio.ensure_future(wait("reads"))
+    await asyncio.sleep(0)
+    write = asyncio.ensure_future(wait("writes"))
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 2
+
+    controller.release("writes")
+    await write
+    assert order == ["writes"] and not read.done()
+    controller.release("writes")
+    await read
+    assert order == ["writes", "reads"]
+    controller.release("reads")
+    assert controller.active == 0
+
+
+async def test_full_queue_is_rejected_with_retry_after():
+    controller = AdmissionController({"reads": (1, 1, 5.0)})
+    assert await controller.acquire("reads") is None
+    queued = asyncio.ensure_future(controller.acquire("reads"))
+    await asyncio.sleep(0)
+
+    assert await controller.acquire("reads") >= 1
+    assert controller.classes["reads"].rejected == {"queue_full": 1}
+    controller.release("reads")
+    assert await queued is None
+
+
+async def test_expected_wait_beyond_deadline_is_rejected():
+    controller = AdmissionController({"analytics": (1, 8, 0.5)})
+    controller.classes["analytics"].service_time = 2.0
+    assert await controller.acquire("analytics") is None
+
+    assert await controller.acquire("analytics") == 2
+    assert controller.classes["analytics"].rejected == {"deadline": 1}
+
+
+async def test_queued_request_times_out():
+    controller = AdmissionController({"reads": (1, 4, 0.05)})
+    controller.classes["reads"].service_time = 0.01
+    assert await controller.acquire("reads") is None
+
+    assert await controller.acquire("reads") == 1
+    assert controller.classes["reads"].rejected == {"deadline": 1}
+    assert controller.classes["reads"].queued == 0
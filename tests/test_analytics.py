@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pytest
+
+from agreements import AgreementCreate, build_agreement_record
+from analytics import SNAPSHOT_FIELDS, PortfolioSnapshot, Scenario, ScenarioOverride, SimulationRequest
+
+from tests.samples import sample_payload, sample_record
+
+# Mixed firms, owners, start dates and statuses, including dates the month arithmetic cannot parse
+ROWS = [
+    sample_record(1, firm_name="A", land_owner="X", agreement_date="15-01-2015", development_months=24),
+    sample_record(2, firm_name="A", land_owner="Y", agreement_date="31-08-2019", development_months=36),
+    sample_record(3, firm_name="B", land_owner="X", agreement_date="01-03-2021", development_months=6,
+                  possession_status="Given"),
+    sample_record(4, firm_name="B", land_owner="Y", agreement_date="2020-05-01", development_months=12),
+    sample_record(5, firm_name="C", land_owner="X", agreement_date="", development_months=0),
+    sample_record(6, firm_name="C", land_owner="Y", agreement_date="10-10-2030", development_months=12),
+]
+
+
+def matches(override: ScenarioOverride, row: dict) -> bool:
+    return (
+        (override.ids is None or row['id'] in override.ids)
+        and (override.survey_nos is None or row['survey_no'] in override.survey_nos)
+        and (override.firm_name is None or row['firm_name'] == override.firm_name)
+        and (override.land_owner is None or row['land_owner'] == override.land_owner)
+    )
+
+
+def rebuilt_totals(rows, overrides) -> dict:
+    """Totals from build_agreement_record run on each row after applying the overrides"""
+    totals = dict.fromkeys(('count', 'area', 'free_bu', 'rent', 'expenses', 'deposits'), 0.0)
+    affected = 0
+    for row in rows:
+        data = {name: row[name] for name in AgreementCreate.model_fields}
+        touched = False
+        for override in overrides:
+            if not matches(override, row):
+                continue
+            touched = True
+            data['rent_per_sqft'] *= override.rent_multiplier
+            data['development_months'] = max(data['development_months'] + override.development_months_shift, 0)
+            if override.possession_status is not None:
+                data['possession_status'] = override.possession_status
+        affected += touched
+        record = build_agreement_record(AgreementCreate(**data))
+        totals['count'] += 1
+        totals['area'] += record['area_in_guntas']
+        totals['free_bu'] += record['free_area_bu']
+        totals['rent'] += record['total_rent']
+        totals['expenses'] += record['total_agreement_expense']
+        totals['deposits'] += record['deposit_da']
+    return {
+        'total_land_count': totals['count'],
+        'total_area_guntas': pytest.approx(totals['area']),
+        'total_free_bu_area': pytest.approx(totals['free_bu']),
+        'total_rent_value': pytest.approx(totals['rent']),
+        'total_agreement_expenses': pytest.approx(totals['expenses']),
+        'net_project_cost': pytest.approx(totals['expenses'] + totals['deposits']),
+    }, affected
+
+
+SCENARIOS = {
+    "rent_multiplier": [ScenarioOverride(firm_name="A", rent_multiplier=1.25)],
+    "month_shift": [ScenarioOverride(land_owner="X", development_months_shift=18)],
+    "month_shift_clamped_at_zero": [ScenarioOverride(development_months_shift=-1000)],
+    "possession_given": [ScenarioOverride(firm_name="A", possession_status="Given")],
+    "possession_pending": [ScenarioOverride(firm_name="B", possession_status="Pending")],
+    "no_selectors": [ScenarioOverride(rent_multiplier=0.9, development_months_shift=3)],
+    "ids_and_survey_nos": [
+        ScenarioOverride(ids=[ROWS[0]['id'], ROWS[3]['id']], rent_multiplier=2.0),
+        ScenarioOverride(survey_nos=["2/1", "6/1"], development_months_shift=-6, possession_status="Given"),
+    ],
+    "stacked_overrides": [
+        ScenarioOverride(firm_name="A", rent_multiplier=1.1),
+        ScenarioOverride(land_owner="Y", rent_multiplier=1.1, development_months_shift=-12),
+    ],
+    "no_match": [ScenarioOverride(firm_name="MISSING", rent_multiplier=3.0)],
+}
+
+
+@pytest.mark.parametrize("overrides", SCENARIOS.values(), ids=SCENARIOS.keys())
+def test_scenario_matches_rebuilt_rows(overrides):
+    snapshot = PortfolioSnapshot([{name: row[name] for name in SNAPSHOT_FIELDS} for row in ROWS])
+    now = datetime.now()
+    baseline = snapshot.baseline(now)
+    result = snapshot.simulate(Scenario(name="s", overrides=overrides), baseline, now)
+
+    expected, affected = rebuilt_totals(ROWS, overrides)
+    assert result.totals.model_dump() == expected
+    assert result.affected_agreements == affected
+    assert baseline.model_dump() == rebuilt_totals(ROWS, [])[0]
+    assert result.deltas.total_rent_value == pytest.approx(result.totals.total_rent_value - baseline.total_rent_value)
+
+
+def test_empty_portfolio():
+    result = PortfolioSnapshot([]).run(SimulationRequest(scenarios=[Scenario(name="s")]))
+    assert result.baseline.total_land_count == 0
+    assert result.scenarios[0].affected_agreements == 0
+
+
+def test_simulate_endpoint(client):
+    for i in range(3):
+        client.post("/api/agreements", json=sample_payload(i, firm_name="A" if i else "B"))
+    response = client.post("/api/analytics/simulate", json={"scenarios": [
+        {"name": "raise", "overrides": [{"firm_name": "A", "rent_multiplier": 1.5}]},
+    ]})
+    assert response.status_code == 200
+    result = response.json()
+    summary = client.get("/api/dashboard/summary").json()
+    assert result['baseline']['total_rent_value'] == pytest.approx(summary['total_rent_value'])
+    assert result['scenarios'][0]['affected_agreements'] == 2
+    # Nothing is written back
+    assert client.get("/api/dashboard/summary").json() == summary
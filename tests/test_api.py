@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import main
+from batching import WriteCoalescer
+from portfolio import PortfolioStore
+
+from tests.samples import sample_payload
+
+
+@pytest.mark.parametrize("coalesced", [False, True], ids=["direct", "coalesced"])
+def test_duplicate_create_returns_409(client, monkeypatch, coalesced):
+    if coalesced:
+        monkeypatch.setattr(main, "write_coalescer", WriteCoalescer(main.storage, window=0.005))
+    assert client.post("/api/agreements", json=sample_payload(1)).status_code == 200
+    response = client.post("/api/agreements", json=sample_payload(1))
+    assert response.status_code == 409
+
+
+def test_cross_origin_write_sets_pin_cookie_with_credentials(client):
+    # The frontend runs on another origin; the pin only works if CORS lets the browser keep the cookie
+    response = client.post("/api/agreements", json=sample_payload(1), headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.cookies.get("primary_until")
+
+
+def test_dashboard_reads_database_while_store_reloads(client, monkeypatch):
+    store = PortfolioStore(main.storage)
+    client.portal.call(store.load)
+    main.storage.add_listener(store.on_change)
+    monkeypatch.setattr(main, "portfolio_store", store)
+    try:
+        for i in range(2):
+            client.post("/api/agreements", json=sample_payload(i))
+        assert client.get("/api/dashboard/summary").json()['total_rent_value'] > 0
+
+        # Hold the reload a bulk update triggers, so the reads below see a stale store
+        async def reload_forever():
+            await asyncio.sleep(3600)
+        monkeypatch.setattr(store, "load", reload_forever)
+        response = client.patch("/api/agreements/bulk", json={
+            'where': {'firm_name': "SAMPLE FIRM"}, 'changes': {'possession_status': "Given"},
+        })
+        assert response.json() == {'updated': 2}
+        assert not store.ready
+        assert client.get("/api/dashboard/summary").json()['total_rent_value'] == 0
+        groups = client.get("/api/analytics/breakdown", params={'by': "possession_status"}).json()['groups']
+        assert [group['key'] for group in groups] == ["Given"]
+    finally:
+        main.storage.remove_listener(store.on_change)
+        client.portal.call(store.close)
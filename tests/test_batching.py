@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from batching import WriteCoalescer
+from storage import BatchWriteError, DuplicateAgreementError
+
+from tests.samples import sample_record
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_creates_share_one_batch(repo):
+    calls = []
+    create_many = repo.create_many
+
+    async def counted_create_many(records):
+        calls.append(len(records))
+        return await create_many(records)
+
+    repo.create_many = counted_create_many
+    coalescer = WriteCoalescer(repo, window=0.05)
+    records = [sample_record(i) for i in range(5)]
+
+    results = await asyncio.gather(*(coalescer.submit(record) for record in records))
+
+    assert [r['id'] for r in results] == [r['id'] for r in records]
+    assert calls == [5]
+    assert coalescer.stats() == {'batches': 1, 'rows': 5, 'pending': 0}
+    assert len(await repo.list(0, 100)) == 5
+
+
+async def test_full_batch_is_written_before_the_window(repo):
+    coalescer = WriteCoalescer(repo, window=60, max_rows=3)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(coalescer.submit(sample_record(i)) for i in range(3))), timeout=5
+    )
+    assert len(results) == 3
+    assert coalescer.stats()['batches'] == 1
+
+
+async def test_rolled_back_batch_is_retried_row_by_row(repo):
+    await repo.create(sample_record(1))
+    coalescer = WriteCoalescer(repo, window=0.05)
+
+    results = await asyncio.gather(
+        *(coalescer.submit(sample_record(i)) for i in range(3)), return_exceptions=True
+    )
+
+    assert isinstance(results[1], DuplicateAgreementError)
+    assert results[0]['survey_no'] == "0/1" and results[2]['survey_no'] == "2/1"
+    assert {r['survey_no'] for r in await repo.list(0, 100)} == {"0/1", "1/1", "2/1"}
+
+
+class PartialFailureStorage:
+    """A non-atomic backend that reports which rows of a batch failed"""
+
+    def __init__(self, failures: dict):
+        self.failures = failures
+        self.batches = []
+
+    async def create_many(self, records):
+        self.batches.append(records)
+        raise BatchWriteError(self.failures)
+
+
+async def test_batch_write_error_reaches_each_caller():
+    error = DuplicateAgreementError("1/1")
+    storage = PartialFailureStorage({1: error})
+    coalescer = WriteCoalescer(storage, window=0.05)
+    records = [sample_record(i) for i in range(3)]
+
+    results = await asyncio.gather(*(coalescer.submit(record) for record in records), return_exceptions=True)
+
+    assert len(storage.batches) == 1
+    assert results == [records[0], error, records[2]]
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from changefeed import ChangeFeed
+from storage import get_repository
+
+from tests.samples import sample_record
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def feed(repo):
+    feed = ChangeFeed(repo, poll_interval=0.05)
+    await feed.start()
+    yield feed
+    await feed.close()
+
+
+async def next_event(queue: asyncio.Queue) -> dict:
+    return await asyncio.wait_for(queue.get(), timeout=5)
+
+
+async def test_changes_arrive_in_order(repo, feed):
+    queue = feed.subscribe()
+    first = await repo.create(sample_record(1))
+    second = await repo.create(sample_record(2))
+    await repo.upsert(second['id'], {**sample_record(3), 'id': second['id']})
+    await repo.delete(first['id'])
+
+    events = [await next_event(queue) for _ in range(4)]
+    assert [(e['type'], [r['id'] for r in e['agreements']]) for e in events] == [
+        ("create", [first['id']]), ("create", [second['id']]), ("update", [second['id']]), ("delete", [first['id']]),
+    ]
+    # Summaries are read when an event is published, so the last one matches the final state
+    assert events[-1]['summary'] == await repo.summary()
+
+
+async def test_events_carry_summary(repo, feed):
+    queue = feed.subscribe()
+    for i in range(1, 3):
+        await repo.create(sample_record(i))
+        event = await next_event(queue)
+        assert event['summary']['total_land_count'] == i
+        assert event['summary']['total_rent_value'] == pytest.approx((await repo.summary())['total_rent_value'])
+
+
+async def test_slow_client_gets_resync(repo, feed):
+    feed.client_queue_size = 3
+    queue = feed.subscribe()
+    for i in range(4):
+        await repo.create(sample_record(i))
+    await asyncio.sleep(0.2)
+
+    assert queue.qsize() == 1
+    assert (await next_event(queue))['type'] == "resync"
+
+
+async def test_other_instance_writes_are_polled(repo, feed):
+    if feed.using_change_stream:
+        pytest.skip("the change stream reports other instances' writes")
+    other = get_repository(repo.name)
+    await other.startup()
+    queue = feed.subscribe()
+    try:
+        record = await repo.create(sample_record(1))
+        assert (await next_event(queue))['type'] == "create"
+        # Local writes are not reported twice
+        await asyncio.sleep(0.3)
+        assert queue.empty()
+
+        await other.create(sample_record(2))
+        assert (await next_event(queue))['type'] == "resync"
+        await other.delete(record['id'])
+        assert (await next_event(queue))['type'] == "resync"
+    finally:
+        await other.close()
+
+
+class DisconnectingRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+async def test_stream_unsubscribes_on_disconnect(repo, feed, monkeypatch):
+    monkeypatch.setattr(main, "change_feed", feed)
+    monkeypatch.setattr(main, "storage", repo)
+    request = DisconnectingRequest()
+    response = await main.stream_agreements(request)
+    assert feed.client_count == 1
+
+    events = response.body_iterator
+    ready = await events.__anext__()
+    assert ready.startswith("event: ready\n")
+    assert json.loads(ready.split("data: ", 1)[1])['summary']['total_land_count'] == 0
+
+    request.disconnected = True
+    with pytest.raises(StopAsyncIteration):
+        await events.__anext__()
+    assert feed.client_count == 0
+
+
+async def test_stream_unsubscribes_when_cancelled(repo, feed, monkeypatch):
+    monkeypatch.setattr(main, "change_feed", feed)
+    monkeypatch.setattr(main, "storage", repo)
+    response = await main.stream_agreements(DisconnectingRequest())
+    await response.body_iterator.__anext__()
+
+    await response.body_iterator.aclose()
+    assert feed.client_count == 0
@@ -0,0 +1,185 @@
+import argparse
+import json
+
+import httpx
+import pandas as pd
+import pytest
+
+import import_agreements
+from import_agreements import (
+    COLUMNS, ROOT_DIR, Checkpoint, RetryableStatus, file_digest, http_sender, load_payloads, run_import, with_retries,
+)
+
+pytestmark = pytest.mark.anyio
+
+WAREHOUSE_CSV = str(ROOT_DIR / "warehouse.csv")
+
+
+def test_every_mapped_column_is_in_the_register():
+    headers = set(pd.read_csv(WAREHOUSE_CSV, dtype=str, nrows=0).columns.str.strip())
+    assert set(COLUMNS.values()) <= headers
+
+
+def test_load_payloads_reads_register_rows():
+    payloads = load_payloads(WAREHOUSE_CSV, "%m/%d/%Y")
+    assert payloads[34] == {
+        "survey_no": "7/2/B",
+        "firm_name": "",
+        "land_owner": "RUPESH MADHUKAR DONGARE",
+        "area": "0.60.70",
+        "doc_no_1": "15183/2021",
+        "agreement_date": "14-12-2021",
+        "development_months": 18,
+        "possession_status": "Given",
+        "rent_per_sqft": 7.0,
+        "free_area_bu": 20000.0,
+        "free_area_cp": 16000.0,
+        "agreement_value": 2998500.0,
+        "deposit_da": 0.0,
+        "stamp_duty_1": 1325800.0,
+        "regi_dd_1": 30000.0,
+        "handling_charges_1": 760.0,
+        "adjudication_1": 0.0,
+        "legal_expenses_1": 0.0,
+        "doc_no_2": "15184/2021",
+        "date_2": "14-12-2021",
+        "stamp_duty_2": 500.0,
+        "regi_dd_2": 100.0,
+        "handling_charges_2": 600.0,
+        "legal_expenses_2": 0.0,
+        "doc_no_3": "15186/2021",
+        "stamp_duty_3": 6300.0,
+        "regi_dd_3": 25000.0,
+        "handling_charges_3": 680.0,
+    }
+    # "  408,000.00 " amounts, blank development periods and month-first dates
+    first = payloads[0]
+    assert (first["deposit_da"], first["stamp_duty_1"], first["development_months"]) == (408000.0, 863140.0, 0)
+    assert first["agreement_date"] == "26-04-2013"
+
+
+# ---------- RETRIES ----------
+def failing(*errors):
+    """A send that raises each error in turn, then returns "ok"; `calls` counts attempts"""
+    remaining = list(errors)
+
+    async def send():
+        send.calls += 1
+        if remaining:
+            raise remaining.pop(0)
+        return "ok"
+
+    send.calls = 0
+    return send
+
+
+async def test_retryable_errors_are_retried():
+    send = failing(RetryableStatus("HTTP 503"), httpx.ConnectError("refused"))
+    assert await with_retries(send, 5, 0, (RetryableStatus, httpx.TransportError)) == "ok"
+    assert send.calls == 3
+
+
+async def test_retries_are_bounded():
+    send = failing(*[RetryableStatus("HTTP 503")] * 5)
+    with pytest.raises(RetryableStatus):
+        await with_retries(send, 2, 0, (RetryableStatus,))
+    assert send.calls == 3
+
+
+async def test_other_errors_fail_fast():
+    send = failing(ValueError("bad row"))
+    with pytest.raises(ValueError):
+        await with_retries(send, 5, 0, (RetryableStatus, httpx.TransportError))
+    assert send.calls == 1
+
+
+@pytest.mark.parametrize("status, attempts", [(503, 3), (409, 3), (422, 1), (400, 1)])
+async def test_http_sender_retries_only_retry_status(status, attempts):
+    requests = []
+
+    def respond(request):
+        requests.append(request)
+        if len(requests) < 3:
+            return httpx.Response(status, json={"detail": "no"})
+        return httpx.Response(200, json={"created": 1, "updated": 0})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+        send = http_sender(client, "http://api/agreements/import")
+        try:
+            result = await with_retries(lambda: send([{}]), 5, 0, (RetryableStatus, httpx.TransportError))
+        except httpx.HTTPStatusError:
+            result = None
+    assert len(requests) == attempts
+    assert (result is not None) == (attempts > 1)
+
+
+# ---------- CHECKPOINTS ----------
+def test_checkpoint_for_another_file_or_chunk_size_is_ignored(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = Checkpoint(path, "digest", 10)
+    checkpoint.mark(0)
+    checkpoint.mark(2)
+
+    assert Checkpoint(path, "digest", 10).done == {0, 2}
+    assert Checkpoint(path, "digest", 20).done == set()
+    assert Checkpoint(path, "other", 10).done == set()
+
+
+def import_args(tmp_path, **overrides):
+    return argparse.Namespace(**{
+        "csv_file": WAREHOUSE_CSV,
+        "checkpoint": str(tmp_path / "checkpoint.json"),
+        "date_format": "%m/%d/%Y",
+        "chunk_size": 10,
+        "concurrency": 2,
+        "retries": 0,
+        "backoff": 0,
+        "direct": True,
+        **overrides,
+    })
+
+
+@pytest.fixture
+def imported(tmp_path, monkeypatch):
+    """Record the survey numbers of every chunk sent by a --direct import"""
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "import.db"))
+    sent = []
+
+    def direct_sender(storage):
+        async def send(chunk):
+            if any(payload["survey_no"] in fail_on for payload in chunk):
+                raise ValueError("rejected")
+            sent.append([payload["survey_no"] for payload in chunk])
+            return {"created": len(chunk), "updated": 0}
+        return send
+
+    fail_on = set()
+    monkeypatch.setattr(import_agreements, "direct_sender", direct_sender)
+    return sent, fail_on
+
+
+async def test_resume_skips_imported_chunks(tmp_path, imported):
+    sent, fail_on = imported
+    args = import_args(tmp_path)
+    payloads = load_payloads(WAREHOUSE_CSV, args.date_format)
+    fail_on.add(payloads[25]["survey_no"])
+
+    with pytest.raises(ValueError):
+        await run_import(args)
+    with open(args.checkpoint) as f:
+        assert json.load(f) == {"key": f"{file_digest(WAREHOUSE_CSV)}:10", "done": [0, 1, 3]}
+
+    sent.clear()
+    fail_on.clear()
+    await run_import(args)
+    assert sent == [[payload["survey_no"] for payload in payloads[20:30]]]
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+async def test_checkpoint_from_other_chunk_size_restarts(tmp_path, imported):
+    sent, _ = imported
+    args = import_args(tmp_path)
+    Checkpoint(args.checkpoint, file_digest(WAREHOUSE_CSV), 20).mark(0)
+
+    await run_import(args)
+    assert len(sent) == 4
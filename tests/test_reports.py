@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from reports import ReportRequest, ReportService
+from storage import get_repository
+
+from tests.samples import sample_record
+
+pytestmark = pytest.mark.anyio
+
+REGISTER = ReportRequest(report_type="register", format="xlsx")
+
+
+@pytest.fixture
+async def service(repo, tmp_path):
+    service = ReportService(repo, str(tmp_path))
+    service.directory.mkdir(exist_ok=True)
+    service.renders = {}
+
+    def render(report_type, fmt, rows, path):
+        # Renders finish when the test says so, in any order
+        future = asyncio.get_running_loop().create_future()
+        service.renders[path] = (future, rows)
+        return future
+
+    service._render = render
+    return service
+
+
+async def finish(service, job):
+    future, rows = service.renders[str(service.artifact(job.id))]
+    service.artifact(job.id).write_text(str(len(rows)))
+    future.set_result(None)
+    await asyncio.sleep(0)
+
+
+async def test_unchanged_data_is_served_from_cache(repo, service):
+    await repo.create(sample_record(1))
+    first = await service.submit(REGISTER)
+    assert (await service.submit(REGISTER)).id == first.id  # shares the running render
+    await finish(service, first)
+    assert first.status == "done"
+
+    cached = await service.submit(REGISTER)
+    assert cached.cached and cached.status == "done"
+    assert len(service.renders) == 1
+
+    await repo.create(sample_record(2))
+    changed = await service.submit(REGISTER)
+    assert not changed.cached
+    await finish(service, changed)
+    # The newer render replaces the older artifact
+    assert not service.artifact(first.id).exists()
+    assert service.artifact(changed.id).read_text() == "2"
+
+
+async def test_writes_from_another_instance_invalidate_the_cache(repo, service):
+    # A second repository on the same database stands in for another worker or import_agreements.py --direct
+    other = get_repository(repo.name)
+    await other.startup()
+    try:
+        await repo.create(sample_record(1))
+        first = await service.submit(REGISTER)
+        await finish(service, first)
+
+        await other.create(sample_record(2))
+        changed = await service.submit(REGISTER)
+        assert not changed.cached
+        await finish(service, changed)
+        assert service.artifact(changed.id).read_text() == "2"
+    finally:
+        await other.close()
+
+
+async def test_late_render_of_older_data_keeps_newer_artifact(repo, service):
+    await repo.create(sample_record(1))
+    older = await service.submit(REGISTER)
+    await repo.create(sample_record(2))
+    newer = await service.submit(REGISTER)
+
+    await finish(service, newer)
+    await finish(service, older)
+    assert service.artifact(newer.id).exists()
+    assert (await service.submit(REGISTER)).cached
+
+
+async def test_missing_artifact_is_rendered_again(repo, service):
+    await repo.create(sample_record(1))
+    first = await service.submit(REGISTER)
+    await finish(service, first)
+    service.artifact(first.id).unlink()
+
+    again = await service.submit(REGISTER)
+    assert not again.cached and again.status == "pending"
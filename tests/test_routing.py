@@ -0,0 +1,40 @@
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from routing import ReadYourWritesMiddleware, reads_from_primary, record_write
+
+
+async def write(request):
+    record_write()
+    return JSONResponse({})
+
+
+async def read(request):
+    return JSONResponse({"primary": reads_from_primary()})
+
+
+def make_client(window: float) -> TestClient:
+    app = Starlette(routes=[Route("/write", write, methods=["POST"]), Route("/read", read)])
+    app.add_middleware(ReadYourWritesMiddleware, window=window)
+    return TestClient(app)
+
+
+def test_reads_use_replica_until_client_writes():
+    client = make_client(window=5)
+    assert client.get("/read").json() == {"primary": False}
+    assert "set-cookie" not in client.get("/read").headers
+
+    response = client.post("/write")
+    assert response.cookies.get("primary_until")
+    assert "HttpOnly" in response.headers["set-cookie"]
+    # The client echoes the cookie back and is pinned to the primary
+    assert client.get("/read").json() == {"primary": True}
+    assert make_client(window=5).get("/read").json() == {"primary": False}
+
+
+def test_pin_expires():
+    client = make_client(window=0)
+    client.post("/write")
+    assert client.get("/read").json() == {"primary": False}
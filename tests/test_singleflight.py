@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from routing import client_request
+from singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+class Computation:
+    """An async computation held open until `released` is set; counts how often it ran"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.runs = 0
+        self.released = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        await self.released.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+async def started(*callers) -> list:
+    tasks = [asyncio.ensure_future(caller()) for caller in callers]
+    await asyncio.sleep(0)
+    return tasks
+
+
+async def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    compute = Computation(result=[1, 2, 3])
+    tasks = await started(*[lambda: flight.run(("list", 0), compute)] * 5)
+
+    compute.released.set()
+    results = await asyncio.gather(*tasks)
+    assert compute.runs == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {
+        "calls": 5, "coalesced": 4, "in_flight": 0, "by_name": {"list": {"calls": 5, "coalesced": 4}},
+    }
+
+
+async def test_different_keys_run_separately():
+    flight = SingleFlight()
+    first, second = Computation("a"), Computation("b")
+    tasks = await started(lambda: flight.run(("list", 0), first), lambda: flight.run(("list", 100), second))
+    first.released.set()
+    second.released.set()
+    assert await asyncio.gather(*tasks) == ["a", "b"]
+
+
+async def test_exception_reaches_every_caller():
+    flight = SingleFlight()
+    compute = Computation(error=RuntimeError("database gone"))
+    tasks = await started(*[lambda: flight.run(("summary",), compute)] * 3)
+
+    compute.released.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert compute.runs == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_invalidate_starts_a_new_flight():
+    flight = SingleFlight()
+    before, after = Computation("old"), Computation("new")
+    early = await started(lambda: flight.run(("summary",), before))
+    flight.invalidate("update", [])
+    late = await started(lambda: flight.run(("summary",), after))
+
+    before.released.set()
+    after.released.set()
+    assert await asyncio.gather(*early, *late) == ["old", "new"]
+    assert flight.stats()["coalesced"] == 0
+
+
+async def test_primary_and_replica_reads_do_not_share():
+    flight = SingleFlight()
+    replica, primary = Computation("replica"), Computation("primary")
+
+    async def read(pinned, compute):
+        with client_request(pinned=pinned):
+            return await flight.run(("get", "id"), compute)
+
+    tasks = await started(lambda: read(False, replica), lambda: read(True, primary))
+    replica.released.set()
+    primary.released.set()
+    assert await asyncio.gather(*tasks) == ["replica", "primary"]
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+    compute = Computation("rows")
+    leader, follower = await started(*[lambda: flight.run(("list", 0), compute)] * 2)
+
+    leader.cancel()
+    compute.released.set()
+    assert await follower == "rows"
+
+
+# ---------- run_sync ----------
+def run_in_threads(flight: SingleFlight, key, compute, callers: int):
+    """Start `callers` threads on run_sync and wait until all of them have joined"""
+    pool = ThreadPoolExecutor(callers)
+
+    def call():
+        try:
+            return flight.run_sync(key, compute)
+        except Exception as exc:
+            return exc
+
+    futures = [pool.submit(call) for _ in range(callers)]
+    deadline = time.monotonic() + 5
+    while flight.stats()["calls"] < callers and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return pool, futures
+
+
+class BlockingComputation:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.runs = 0
+        self.released = threading.Event()
+
+    def __call__(self):
+        self.runs += 1
+        assert self.released.wait(5)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_sync_callers_share_one_computation():
+    flight = SingleFlight()
+    compute = BlockingComputation(result={"total_land_count": 3})
+    pool, futures = run_in_threads(flight, ("summary",), compute, 6)
+
+    compute.released.set()
+    results = [future.result(5) for future in futures]
+    pool.shutdown()
+    assert compute.runs == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {
+        "calls": 6, "coalesced": 5, "in_flight": 0, "by_name": {"summary": {"calls": 6, "coalesced": 5}},
+    }
+
+
+def test_sync_exception_reaches_every_caller():
+    flight = SingleFlight()
+    compute = BlockingComputation(error=RuntimeError("database gone"))
+    pool, futures = run_in_threads(flight, ("summary",), compute, 4)
+
+    compute.released.set()
+    results = [future.result(5) for future in futures]
+    pool.shutdown()
+    assert compute.runs == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_sync_invalidate_and_routing_start_new_flights():
+    flight = SingleFlight()
+    compute = BlockingComputation(result="old")
+    pool, futures = run_in_threads(flight, ("summary",), compute, 1)
+
+    # The thread is background work, which reads the primary; a replica read runs on its own
+    with client_request():
+        assert flight.run_sync(("summary",), lambda: "replica") == "replica"
+    # Same routing, so only a new generation keeps this call from joining
+    flight.invalidate()
+    assert flight.run_sync(("summary",), lambda: "new") == "new"
+
+    compute.released.set()
+    assert futures[0].result(5) == "old"
+    pool.shutdown()
+    assert flight.stats()["coalesced"] == 0
@@ -0,0 +1,245 @@
+import pytest
+
+from agreements import AGREEMENT_FIELDS, Agreement, apply_agreement_changes, changes_need_row_recompute
+from routing import client_request
+from storage import Base, BatchWriteError, DuplicateAgreementError, get_repository
+
+from tests.samples import sample_record
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_create_get_list(repo):
+    assert (await repo.summary())['total_land_count'] == 0
+
+    first = await repo.create(sample_record(1))
+    Agreement(**first)
+    assert (await repo.get(first['id']))['survey_no'] == "1/1"
+    assert await repo.get("missing") is None
+
+    second = await repo.create(sample_record(2))
+    ordered = await repo.list(0, 10, "rent_per_sqft", 1)
+    assert [r['id'] for r in ordered] == [first['id'], second['id']]
+    assert len(await repo.list(1, 10, "rent_per_sqft", 1)) == 1
+
+
+async def test_upsert_keeps_created_at(repo):
+    first = await repo.create(sample_record(1))
+    replacement = {**sample_record(3), 'id': first['id']}
+    updated = await repo.upsert(first['id'], replacement)
+    assert updated['created_at'] == first['created_at']
+    assert (await repo.get(first['id']))['survey_no'] == "3/1"
+
+    inserted = await repo.upsert("fixed-id", sample_record(4))
+    assert inserted['id'] == "fixed-id"
+
+
+async def test_summary_and_columns_match_rows(repo):
+    for i in range(3):
+        await repo.create(sample_record(i))
+    summary = await repo.summary()
+    rows = await repo.list(0, 100)
+
+    assert summary['total_land_count'] == 3
+    assert summary['total_rent_value'] == pytest.approx(sum(r['total_rent'] for r in rows))
+    assert summary['net_project_cost'] == pytest.approx(sum(r['total_agreement_expense'] + r['deposit_da'] for r in rows))
+    columns = await repo.fetch_columns(['id', 'rent_per_sqft'])
+    expected = [{'id': r['id'], 'rent_per_sqft': r['rent_per_sqft']} for r in rows]
+    assert sorted(columns, key=lambda r: r['id']) == sorted(expected, key=lambda r: r['id'])
+
+
+async def test_delete(repo):
+    await repo.upsert("fixed-id", sample_record(4))
+    assert await repo.delete("fixed-id") is True
+    assert await repo.delete("fixed-id") is False
+
+
+async def test_client_reads_its_own_writes(repo):
+    with client_request() as state:
+        record = await repo.create(sample_record(99))
+        assert state["primary"] and state["wrote"]
+        assert await repo.get(record['id']) is not None
+    with client_request(pinned=True):
+        assert await repo.get(record['id']) is not None
+
+
+async def test_unpinned_reads_go_to_replica(tmp_path, monkeypatch):
+    # An unreplicated second file stands in for the replica, so the two reads can be told apart
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "primary.db"))
+    monkeypatch.setenv("SQLITE_READ_PATH", str(tmp_path / "replica.db"))
+    repository = get_repository("sqlite")
+    await repository.startup()
+    Base.metadata.create_all(bind=repository.read_engine)
+    try:
+        record = await repository.create(sample_record(1))
+        with client_request(pinned=True):
+            assert await repository.get(record['id']) is not None
+        with client_request():
+            assert await repository.get(record['id']) is None
+    finally:
+        await repository.close()
+
+
+async def test_duplicate_creates_are_rejected(repo):
+    await repo.create(sample_record(1))
+    with pytest.raises(DuplicateAgreementError):
+        await repo.create(sample_record(1))
+    with pytest.raises((DuplicateAgreementError, BatchWriteError)) as raised:
+        await repo.create_many([sample_record(2), sample_record(1)])
+    if isinstance(raised.value, BatchWriteError):
+        # Non-atomic backends name the failed row and keep the rest
+        assert isinstance(raised.value.errors[1], DuplicateAgreementError)
+        assert list(raised.value.errors) == [1]
+
+
+async def test_create_many(repo):
+    records = [sample_record(i) for i in range(5)]
+    assert await repo.create_many(records) == records
+    assert {r['id'] for r in await repo.list(0, 100)} == {r['id'] for r in records}
+
+
+async def test_import_records_upserts_on_natural_key(repo):
+    existing = await repo.create(sample_record(1))
+    records = [sample_record(1, firm_name="RENAMED"), sample_record(2)]
+    assert await repo.import_records(records) == {'created': 1, 'updated': 1}
+
+    rows = {r['survey_no']: r for r in await repo.list(0, 100)}
+    assert len(rows) == 2
+    assert rows["1/1"]['id'] == existing['id']
+    assert rows["1/1"]['created_at'] == existing['created_at']
+    assert rows["1/1"]['firm_name'] == "RENAMED"
+    assert await repo.import_records([sample_record(2)]) == {'created': 0, 'updated': 1}
+
+
+async def test_bulk_delete(repo):
+    for i in range(4):
+        await repo.create(sample_record(i, firm_name="A" if i % 2 else "B"))
+    assert await repo.bulk_delete({'firm_name': "A"}) == 2
+    assert {r['firm_name'] for r in await repo.list(0, 100)} == {"B"}
+    assert await repo.bulk_delete({'firm_name': "A"}) == 0
+
+
+BULK_CASES = {
+    "rent_multiplier": ({}, 1.1),
+    "rent_value_and_multiplier": ({'rent_per_sqft': 12.5}, 1.2),
+    "area_and_free_area": ({'area': "1.50.0", 'free_area_bu': 7000.0}, None),
+    "free_area_only": ({'free_area_bu': 0.0}, None),
+    "expense_fields": ({'stamp_duty_2': 100.0, 'legal_expenses_1': 250.0, 'handling_charges_3': 40.0}, None),
+    "given": ({'possession_status': "Given"}, None),
+    "text_only": ({'land_owner': "NEW OWNER"}, None),
+    "row_recompute": ({'development_months': 12, 'possession_status': "Pending"}, None),
+}
+
+
+def stale_record(i: int, months_behind: int, **changes) -> dict:
+    """A record last written `months_behind` months ago: its rent months have not caught up"""
+    record = sample_record(i, **changes)
+    record['total_months'] -= months_behind
+    record['total_rent'] = record['total_months'] * record['rent_per_sqft'] * record['free_area_bu']
+    return record
+
+
+@pytest.mark.parametrize("changes, rent_multiplier", BULK_CASES.values(), ids=BULK_CASES.keys())
+async def test_bulk_update_matches_row_rebuild(repo, changes, rent_multiplier):
+    # The set-based SQL expressions and Mongo pipeline must agree with apply_agreement_changes
+    originals = {}
+    for i in range(4):
+        # Rows 2 and 3 were written six months ago
+        record = stale_record(i, 6 if i >= 2 else 0, firm_name="A" if i % 2 else "B", area="0.%02d.5" % (i * 7))
+        assert record['total_months'] > 0
+        originals[record['id']] = await repo.create(record)
+
+    assert await repo.bulk_update({'firm_name': "A"}, changes, rent_multiplier) == 2
+
+    for row in await repo.list(0, 100):
+        original = originals[row['id']]
+        if original['firm_name'] == "A":
+            expected = apply_agreement_changes(original, changes, rent_multiplier)
+            if not changes_need_row_recompute(changes, rent_multiplier) and 'possession_status' not in changes:
+                # Set-based changes leave the rent months as last written
+                expected.update(total_months=original['total_months'], total_rent=original['total_rent'])
+        else:
+            expected = original
+        for field in AGREEMENT_FIELDS:
+            assert row[field] == pytest.approx(expected[field]), field
+
+
+@pytest.mark.parametrize("changes, rent_multiplier", [
+    ({'rent_per_sqft': 12.5}, None), ({}, 1.1), ({'free_area_bu': 6000.0}, None),
+], ids=["rent", "rent_multiplier", "free_area"])
+async def test_bulk_rent_change_catches_up_stale_months(repo, changes, rent_multiplier):
+    stale = await repo.create(stale_record(1, 6))
+    current = apply_agreement_changes(stale, {}, None)
+
+    await repo.bulk_update({'ids': [stale['id']]}, changes, rent_multiplier)
+
+    row = await repo.get(stale['id'])
+    # Same figures as a PUT of the changed agreement
+    expected = apply_agreement_changes(stale, changes, rent_multiplier)
+    assert row['total_months'] == current['total_months'] == stale['total_months'] + 6
+    assert row['total_rent'] == pytest.approx(expected['total_rent'])
+
+
+class FailingCollection:
+    """Stands in for the Motor collection: every write fails after `error`"""
+
+    def __init__(self, documents, error):
+        self.documents = documents
+        self.error = error
+
+    def find(self, query, projection=None):
+        documents = self.documents
+
+        class Cursor:
+            async def to_list(self, length):
+                return documents
+        return Cursor()
+
+    async def update_many(self, query, update):
+        raise self.error
+
+    async def bulk_write(self, operations, ordered=True):
+        raise self.error
+
+
+def mongo_failures():
+    from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+    duplicate = {'index': 0, 'code': 11000, 'errmsg': "E11000 duplicate key"}
+    return {
+        "update_many": ({'land_owner': "X"}, DuplicateKeyError("E11000 duplicate key", 11000), DuplicateAgreementError),
+        "bulk_write": ({'development_months': 6}, BulkWriteError({'writeErrors': [duplicate]}), DuplicateAgreementError),
+        "other": ({'land_owner': "X"}, WriteError("document failed validation", 121), WriteError),
+    }
+
+
+def mongo_repository(collection, notified: list):
+    pytest.importorskip("motor")
+    from storage import MongoAgreementRepository
+
+    # Motor connects lazily; the stand-in collection means it never does
+    repository = MongoAgreementRepository("mongodb://localhost:1", "unused")
+    repository.collection = collection
+    repository.add_listener(lambda change_type, rows: notified.append(change_type))
+    return repository
+
+
+@pytest.mark.parametrize("case", ["update_many", "bulk_write", "other"])
+async def test_mongo_bulk_update_failure_resyncs(case):
+    changes, error, raised = mongo_failures()[case]
+    notified = []
+    repository = mongo_repository(FailingCollection([sample_record(1)], error), notified)
+    with pytest.raises(raised):
+        await repository.bulk_update({'firm_name': "A"}, changes)
+    # Unordered Mongo writes are not rolled back, so listeners must refetch
+    assert notified == ["resync"]
+    await repository.close()
+
+
+async def test_mongo_import_failure_resyncs():
+    notified = []
+    repository = mongo_repository(FailingCollection([], mongo_failures()["bulk_write"][1]), notified)
+    with pytest.raises(DuplicateAgreementError):
+        await repository.import_records([sample_record(1)])
+    assert notified == ["resync"]
+    await repository.close()